@@ -0,0 +1,76 @@
+"""
+Compare matching imports against dependencies with difflib (as una used to do)
+and with the normalized exact-first matcher in `una.check`.
+
+Usage:
+    uv run python benchmarks/bench_match.py [--imports 500] [--deps 300] [--repeat 3]
+"""
+
+# pyright: reportPrivateUsage=false
+import argparse
+import difflib
+import random
+import string
+import time
+from collections.abc import Callable
+
+from una import check
+from una.types import Imports
+
+
+def difflib_diff(imports: Imports, deps: set[str]) -> set[str]:
+    """The matcher before the normalized index was added."""
+    deps_imports: set[str] = set().union(*imports.values())
+    unknown_imports = deps_imports.difference(deps)
+    unknowns = {str.lower(u) for u in unknown_imports}
+    deps_norm = {str.lower(d).replace("-", "_") for d in deps}
+    return {u for u in unknowns if not difflib.get_close_matches(u, deps_norm, cutoff=0.6)}
+
+
+def make_names(rng: random.Random, n: int) -> list[str]:
+    parts = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 8))) for _ in range(n)]
+    return [f"{p}-{rng.choice(['client', 'core', 'utils', 'sdk'])}" for p in parts]
+
+
+def bench(fn: Callable[[], set[str]], repeat: int) -> tuple[float, set[str]]:
+    best = float("inf")
+    res: set[str] = set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = fn()
+        best = min(best, time.perf_counter() - start)
+    return best, res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--imports", type=int, default=500)
+    parser.add_argument("--deps", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    deps = set(make_names(rng, args.deps))
+    # most imports are declared (as their import name), the rest are unknown
+    declared = [
+        d.replace("-", "_") for d in rng.sample(sorted(deps), k=min(len(deps), args.imports))
+    ]
+    unknown = make_names(rng, max(0, args.imports - len(declared)))
+    imports = {"pkg": {*declared, *(u.replace("-", "_") for u in unknown)}}
+
+    matchers: dict[str, Callable[[], set[str]]] = {
+        "difflib": lambda: difflib_diff(imports, deps),
+        "exact": lambda: check._ext_dep_diff(imports, deps),
+        "exact+fuzzy": lambda: check._ext_dep_diff(imports, deps, fuzzy=True),
+    }
+    results = {name: bench(fn, args.repeat) for name, fn in matchers.items()}
+
+    base_time = results["difflib"][0]
+    print(f"{len(imports['pkg'])} imports, {len(deps)} deps, best of {args.repeat}")
+    for name, (elapsed, unknowns) in results.items():
+        speedup = base_time / elapsed
+        print(f"{name:>12}: {elapsed * 1000:9.2f} ms  ({speedup:7.1f}x)  {len(unknowns)} unknown")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Compare the import scanners in `una.parse` on a large synthetic package.
+
+Usage:
+    uv run python benchmarks/bench_parse.py [--modules 2000] [--repeat 3]
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+from una import parse
+
+_MODULE = '''\
+"""Module {i}."""
+
+import os
+import json
+from typing import TYPE_CHECKING
+
+from ns.lib_{a} import helper_{i}
+
+if TYPE_CHECKING:
+    from ns.lib_{b} import Model
+
+
+class Thing{i}:
+    """A class with a few methods and plenty of expressions."""
+
+    def __init__(self, values: list[int]) -> None:
+        self.values = [v * 2 + 1 for v in values if v % 3 and v > {i}]
+        self.lookup = {{str(k): (k, k**2, [k] * 3) for k in range(100)}}
+
+    def compute(self, x: float) -> float:
+        total = sum(v / (x + 1) for v in self.values) + len(self.lookup)
+        if total > 10 and (x < 3 or x > 7):
+            return max(total, x) * helper_{i}(os.getpid(), json.dumps(self.lookup))
+        return min(total, x) - abs(x - total) ** 0.5
+
+    def lazy(self) -> dict[str, object]:
+        import math
+
+        return {{"a": math.pi * self.compute(1.5), "b": [f"{{v:04d}}" for v in self.values]}}
+
+
+def run_{i}(things: list[Thing{i}]) -> list[float]:
+    return sorted((t.compute(float(n)) for n, t in enumerate(things)), reverse=True)
+'''
+
+
+def make_package(root: Path, n_modules: int) -> Path:
+    pkg = root / "pkg"
+    code = pkg / "ns" / "pkg"
+    code.mkdir(parents=True)
+    (code / "__init__.py").touch()
+    for i in range(n_modules):
+        content = _MODULE.format(i=i, a=i % 17, b=i % 5)
+        (code / f"mod_{i}.py").write_text(content, encoding="utf-8")
+    return pkg
+
+
+def bench(pkg: Path, engine: parse.Engine, repeat: int) -> tuple[float, set[str]]:
+    best = float("inf")
+    res: set[str] = set()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        res = parse.fetch_all_imports({pkg}, engine=engine)[pkg.name]
+        best = min(best, time.perf_counter() - start)
+    return best, res
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--modules", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        pkg = make_package(Path(tmp), args.modules)
+        results = {e: bench(pkg, e, args.repeat) for e in parse.Engine}
+
+    base_time, base_imports = results[parse.Engine.AST]
+    print(f"{args.modules} modules, best of {args.repeat}")
+    for engine, (elapsed, imports) in results.items():
+        assert imports == base_imports, f"{engine} found different imports"
+        speedup = base_time / elapsed
+        print(f"{engine.value:>6}: {elapsed * 1000:8.1f} ms  ({speedup:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Time `una sync` and the hatch hooks on synthetic workspaces of increasing size.
+
+Each workspace is generated with `una.files` into `--depth` layers of packages,
+where every package imports `--fanout` packages from the layer below it (from
+each of its `--modules` modules). A `--missing` fraction of packages don't
+declare their internal dependencies, so that `una sync` has something to fix.
+
+Usage:
+    uv run python benchmarks/bench_workspace.py [--packages 10,100,1000] [--repeat 3]
+    uv run python benchmarks/bench_workspace.py --json new.json --compare old.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from hatch_una.hatch_build import UnaBuildHook
+from hatch_una.hatch_meta import UnaMetaHook
+
+from una import files
+
+NS = "bench"
+# the arguments that affect the results, stored with them by --json
+_PARAMS = {"modules", "fanout", "depth", "missing", "hook_packages", "repeat"}
+
+_ROOT_PYPROJ = f"""\
+[project]
+name = "{NS}"
+version = "0"
+requires-python = ">=3.11"
+dependencies = []
+
+[tool.uv]
+dev-dependencies = []
+"""
+
+_MODULE = """\
+import os
+
+{imports}
+
+
+def run_{i}() -> list[object]:
+    return [os.getpid(), {uses}]
+"""
+
+
+def generate(
+    root: Path, n_packages: int, modules: int, fanout: int, depth: int, missing: float
+) -> list[str]:
+    """Create a workspace at `root`, returning the package names from the top layer down."""
+    rng = random.Random(0)
+    (root / ".git").mkdir(parents=True)
+    (root / "pyproject.toml").write_text(_ROOT_PYPROJ, encoding="utf-8")
+    files.create_workspace(root)
+
+    layers: list[list[str]] = [[] for _ in range(depth)]
+    for i in range(n_packages):
+        layers[i * depth // n_packages].append(f"pkg_{i}")
+
+    for level, names in enumerate(layers):
+        below = layers[level - 1] if level else []
+        for name in names:
+            deps = rng.sample(below, k=min(fanout, len(below)))
+            declared = deps if rng.random() >= missing else []
+            files.create_package(
+                root,
+                NS,
+                name,
+                "libs",
+                _module(deps, 0),
+                ", ".join(f'"{d}"' for d in declared),
+                "\n".join(f"{d} = {{ workspace = true }}" for d in declared),
+            )
+            code_dir = root / "libs" / name / NS / name
+            for m in range(1, modules):
+                (code_dir / f"mod_{m}.py").write_text(_module(deps, m), encoding="utf-8")
+    return [n for names in reversed(layers) for n in names]
+
+
+def _module(deps: list[str], i: int) -> str:
+    imports = "\n".join(f"from {NS} import {d}" for d in deps)
+    uses = ", ".join(deps)
+    return _MODULE.format(imports=imports, uses=uses, i=i)
+
+
+@contextlib.contextmanager
+def chdir(path: Path) -> Iterator[None]:
+    before = Path.cwd()
+    os.chdir(path)
+    try:
+        yield
+    finally:
+        os.chdir(before)
+
+
+def run_una(root: Path, *args: str) -> None:
+    res = subprocess.run(
+        [sys.executable, "-m", "una", *args], cwd=root, capture_output=True, text=True
+    )
+    # --check-only exits with 1 when dependencies are missing
+    if res.returncode not in (0, 1):
+        raise RuntimeError(f"una {' '.join(args)} failed:\n{res.stderr}")
+
+
+def run_meta_hook(root: Path, names: list[str]) -> None:
+    for name in names:
+        path = root / "libs" / name
+        with chdir(path), contextlib.redirect_stdout(io.StringIO()):
+            UnaMetaHook(str(path), {}).update({})
+
+
+def run_build_hook(root: Path, names: list[str]) -> None:
+    for name in names:
+        path = root / "libs" / name
+        hook = UnaBuildHook(str(path), {}, None, None, str(path / "dist"), "wheel")  # pyright:ignore[reportArgumentType]
+        with chdir(path), contextlib.redirect_stdout(io.StringIO()):
+            hook.initialize("standard", {"force_include": {}})
+
+
+def best_of(repeat: int, setup: Callable[[], None], fn: Callable[[], None]) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        setup()
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_scale(args: argparse.Namespace, n_packages: int, tmp: Path) -> dict[str, float]:
+    params = (n_packages, args.modules, args.fanout, args.depth, args.missing)
+    pristine = tmp / f"pristine-{n_packages}"
+    names = generate(pristine, *params)
+    root = tmp / f"ws-{n_packages}"
+    hook_names = names[: args.hook_packages]
+
+    def fresh() -> None:
+        shutil.rmtree(root, ignore_errors=True)
+        shutil.copytree(pristine, root)
+
+    def no_cache() -> None:
+        shutil.rmtree(root / ".una_cache", ignore_errors=True)
+
+    fresh()
+    results = {
+        "sync --check-only (cold)": best_of(
+            args.repeat, no_cache, lambda: run_una(root, "sync", "--check-only")
+        ),
+        "sync --check-only (warm)": best_of(
+            args.repeat, lambda: None, lambda: run_una(root, "sync", "--check-only")
+        ),
+        "sync": best_of(args.repeat, fresh, lambda: run_una(root, "sync")),
+    }
+    # the hooks run once per package being built, so are reported per call
+    n = len(hook_names)
+    meta = best_of(args.repeat, lambda: None, lambda: run_meta_hook(root, hook_names))
+    build = best_of(args.repeat, lambda: None, lambda: run_build_hook(root, hook_names))
+    results["UnaMetaHook.update (per call)"] = meta / n
+    results["UnaBuildHook.initialize (per call)"] = build / n
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--packages", default="10,100,1000", help="comma-separated scales")
+    parser.add_argument("--modules", type=int, default=5, help="modules per package")
+    parser.add_argument("--fanout", type=int, default=3, help="internal imports per package")
+    parser.add_argument("--depth", type=int, default=5, help="layers of dependencies")
+    parser.add_argument("--missing", type=float, default=0.1, help="fraction of undeclared deps")
+    parser.add_argument("--hook-packages", type=int, default=20, help="packages to run hooks on")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", type=Path, help="write the results to this file")
+    parser.add_argument("--compare", type=Path, help="compare against results from --json")
+    parser.add_argument("--threshold", type=float, default=1.2, help="slowdown that fails")
+    args = parser.parse_args()
+
+    scales = [int(n) for n in args.packages.split(",")]
+    results: dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in scales:
+            for case, seconds in bench_scale(args, n, Path(tmp)).items():
+                results[f"{n}: {case}"] = seconds
+
+    baseline: dict[str, float] = {}
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+
+    print(
+        f"best of {args.repeat}, {args.modules} modules, fanout {args.fanout}, depth {args.depth}"
+    )
+    regressions: list[str] = []
+    for key, seconds in results.items():
+        line = f"{key:<48} {seconds * 1000:10.1f} ms"
+        if key in baseline:
+            ratio = seconds / baseline[key]
+            line += f"  {ratio:5.2f}x"
+            if ratio > args.threshold:
+                regressions.append(key)
+                line += "  REGRESSION"
+        print(line)
+
+    if args.json:
+        params: dict[str, Any] = {k: v for k, v in vars(args).items() if k in _PARAMS}
+        data = {"params": params, "results": results}
+        args.json.write_text(json.dumps(data, indent=2) + "\n")
+    if regressions:
+        sys.exit(f"{len(regressions)} regressions above {args.threshold}x")
+
+
+if __name__ == "__main__":
+    main()
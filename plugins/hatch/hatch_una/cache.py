@@ -0,0 +1,195 @@
+"""
+Cache of the files hatch selects from each internal package.
+
+Selecting them means walking the package and matching every path against the
+gitignore and include/exclude rules, which is slow for big packages that are
+included in many wheels. The selection only changes when files or directories
+are added, removed or renamed (which changes the mtime of their directory) or
+when the rules do, so it's stored in `.una_cache/files.json` keyed by a hash of
+those mtimes.
+
+The wheels built by `una build` are also kept in `.una_cache/wheels/`, keyed by
+a fingerprint of all their inputs and with their SHA-256 digest, so it can reuse
+them when nothing has changed (only the latest one of each package is kept), and
+the generated lazy `__init__` modules in `.una_cache/lazy/`.
+"""
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import shutil
+import tempfile
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from hatchling.builders.constants import EXCLUDED_DIRECTORIES
+from hatchling.builders.sdist import SdistBuilder
+
+from hatch_una import util
+
+CACHE_DIR = ".una_cache"
+FILES_CACHE = "files.json"
+FILES_VERSION = 1
+WHEELS_DIR = "wheels"
+LAZY_DIR = "lazy"
+
+# files that change which files are selected
+_RULE_FILES = (util.PYPROJ, ".gitignore", ".hgignore")
+
+
+def get_package_files(package_dir: Path) -> list[Path]:
+    """The files in `package_dir` that hatch would include in its sdist."""
+    root = util.get_workspace_root().resolve()
+    package_dir = package_dir.resolve()
+    stamp = _tree_stamp(root, package_dir)
+    return [package_dir / f for f in _package_files(root, package_dir, stamp)]
+
+
+@lru_cache
+def _package_files(root: Path, package_dir: Path, stamp: str) -> tuple[str, ...]:
+    key = _key(root, package_dir)
+    entry = _read(root).get(key)
+    if entry and entry["stamp"] == stamp:
+        return tuple(entry["files"])  # pyright:ignore[reportAny]
+
+    finder = SdistBuilder(str(package_dir))
+    found = sorted(
+        Path(f.path).relative_to(package_dir).as_posix()
+        for f in finder.recurse_selected_project_files()
+    )
+    _write(root, key, {"stamp": stamp, "files": found})
+    return tuple(found)
+
+
+def fingerprint(package_dir: Path, version: str) -> str:
+    """
+    A hash of everything that goes into the wheel of the package at `package_dir`.
+
+    That is the version, the injected dependencies, and the contents of the files of
+    the package and of all the internal packages it includes.
+    """
+    package_dir = package_dir.resolve()
+    closure = util.get_closure(package_dir)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"hatch-una:{_hatch_una_version()}\nversion:{version}\n".encode())
+    # hatchling uses this for the timestamps in the wheel
+    h.update(f"epoch:{os.environ.get('SOURCE_DATE_EPOCH', '')}\n".encode())
+    for dep in closure.ext_deps:
+        h.update(f"dep:{dep}\n".encode())
+    for d in [package_dir, *closure.int_deps.values()]:
+        for f in get_package_files(d):
+            with f.open("rb") as fp:
+                digest = hashlib.file_digest(fp, "blake2b").hexdigest()
+            h.update(f"{d.name}/{f.relative_to(d).as_posix()}:{digest}\n".encode())
+    return h.hexdigest()
+
+
+def get_wheel(package_dir: Path, fingerprint: str) -> Path | None:
+    """
+    A previously built wheel of the package with the same fingerprint, if there is one
+    and it still has the digest it was stored with.
+    """
+    wheels = _wheels_dir(package_dir) / fingerprint
+    for wheel in sorted(wheels.glob("*.whl")):
+        try:
+            expected = (wheels / f"{wheel.name}.sha256").read_text(encoding="utf-8")
+        except OSError:
+            continue
+        if _sha256(wheel) == expected.strip():
+            return wheel
+    return None
+
+
+def store_wheel(package_dir: Path, fingerprint: str, wheel: Path) -> None:
+    """Keep `wheel`, and drop the wheels of the package with any other fingerprint."""
+    package_wheels = _wheels_dir(package_dir)
+    wheels = package_wheels / fingerprint
+    wheels.mkdir(parents=True, exist_ok=True)
+    tmp = wheels / f"{wheel.name}.{os.getpid()}.tmp"
+    shutil.copyfile(wheel, tmp)
+    digest = wheels / f"{wheel.name}.sha256"
+    tmp_digest = wheels / f"{digest.name}.{os.getpid()}.tmp"
+    tmp_digest.write_text(_sha256(tmp), encoding="utf-8")
+    tmp.replace(wheels / wheel.name)
+    tmp_digest.replace(digest)
+    for old in package_wheels.iterdir():
+        if old.name != fingerprint:
+            shutil.rmtree(old, ignore_errors=True)
+
+
+def lazy_dir(package_dir: Path) -> Path:
+    """Where the lazy `__init__` modules for the wheel of `package_dir` are written."""
+    return util.get_workspace_root().resolve() / CACHE_DIR / LAZY_DIR / package_dir.name
+
+
+def _wheels_dir(package_dir: Path) -> Path:
+    root = util.get_workspace_root().resolve()
+    return root / CACHE_DIR / WHEELS_DIR / package_dir.resolve().name
+
+
+def _sha256(path: Path) -> str:
+    with path.open("rb") as fp:
+        return hashlib.file_digest(fp, "sha256").hexdigest()
+
+
+def _hatch_una_version() -> str:
+    try:
+        return importlib.metadata.version("hatch-una")
+    except importlib.metadata.PackageNotFoundError:
+        return "dev"
+
+
+def _tree_stamp(root: Path, package_dir: Path) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    for dirpath, dirnames, _ in os.walk(package_dir):
+        # hatch never includes anything from these
+        dirnames[:] = sorted(d for d in dirnames if d not in EXCLUDED_DIRECTORIES)
+        rel = Path(dirpath).relative_to(package_dir).as_posix()
+        h.update(f"{rel}:{os.stat(dirpath).st_mtime_ns}\n".encode())
+    # hatch uses the closest ignore files, which may be anywhere up to the root
+    for d in [package_dir, *package_dir.parents]:
+        for name in _RULE_FILES:
+            try:
+                h.update(f"{d / name}:{(d / name).stat().st_mtime_ns}\n".encode())
+            except FileNotFoundError:
+                pass
+        if d == root:
+            break
+    return h.hexdigest()
+
+
+def _key(root: Path, package_dir: Path) -> str:
+    try:
+        return package_dir.relative_to(root).as_posix()
+    except ValueError:
+        return package_dir.as_posix()
+
+
+def _read(root: Path) -> dict[str, Any]:
+    try:
+        with (root / CACHE_DIR / FILES_CACHE).open(encoding="utf-8") as f:
+            data: dict[str, Any] = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if data.get("version") != FILES_VERSION:
+        return {}
+    return data.get("packages", {})
+
+
+def _write(root: Path, key: str, entry: dict[str, Any]) -> None:
+    cache_dir = root / CACHE_DIR
+    cache_dir.mkdir(exist_ok=True)
+    gitignore = cache_dir / ".gitignore"
+    if not gitignore.exists():
+        gitignore.write_text("# created by una\n*\n", encoding="utf-8")
+    packages = _read(root)
+    packages[key] = entry
+    # several builds may be running at once (also as threads of `una build`),
+    # so each writes its own temporary file and never leaves a partly written one
+    with tempfile.NamedTemporaryFile(
+        "w", encoding="utf-8", dir=cache_dir, prefix=f"{FILES_CACHE}.", suffix=".tmp", delete=False
+    ) as f:
+        json.dump({"version": FILES_VERSION, "packages": packages}, f, separators=(",", ":"))
+    Path(f.name).replace(cache_dir / FILES_CACHE)
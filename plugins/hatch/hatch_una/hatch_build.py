@@ -1,17 +1,20 @@
+import os
 from pathlib import Path
 from typing import Any
 
 from hatchling.builders.config import BuilderConfig
 from hatchling.builders.hooks.plugin.interface import BuildHookInterface
-from hatchling.builders.sdist import SdistBuilder
 from hatchling.plugin import hookimpl
 
-from hatch_una import util
+from hatch_una import cache, lazy, util
 
 
 class UnaBuildHook(BuildHookInterface[BuilderConfig]):
     """
     Force-include all needed internal monorepo dependencies.
+
+    The internal packages listed in the `lazy` setting get an `__init__` module
+    that only imports their contents when they're first used.
     """
 
     PLUGIN_NAME = "una-build"
@@ -23,31 +26,42 @@ class UnaBuildHook(BuildHookInterface[BuilderConfig]):
 
         print("una-build: Injecting internal dependencies")
 
-        # load the config for this package
-        path = Path(self.root)
-        root = util.get_workspace_root()
-        root_conf = util.load_conf(root)
-        members: list[str] = (
-            root_conf.get("tool", {}).get("uv", {}).get("workspace", {}).get("members", [])  # pyright:ignore[reportAny]
-        )
-        _, int_deps = util.get_dependencies(path)
+        # every internal package this one (transitively) depends on
+        closure = util.get_closure(Path(self.root))
 
-        if not int_deps:
+        if not closure.int_deps:
             # this is fine, the package doesn't import anything internally
             return
 
         add_dep_files: dict[str, str] = {}
-        package_dirs = [util.find_package_dir(d, members) for d in int_deps]
-        for package_dir in package_dirs:
-            finder = SdistBuilder(str(package_dir))
-            files = [Path(f.path) for f in finder.recurse_selected_project_files()]
-            for f in files:
+        for package_dir in closure.int_deps.values():
+            # the files hatch would select from the package, cached across builds
+            for f in cache.get_package_files(package_dir):
                 add_dep_files[str(f)] = str(f.relative_to(package_dir))
 
-        build_data["force_include"] = {
-            **build_data["force_include"],
-            **add_dep_files,
-        }
+        lazy_packages: list[str] = self.config.get("lazy", [])
+        for name in lazy_packages:
+            if name not in closure.int_deps:
+                raise ValueError(f"'{name}' in lazy isn't an internal dependency of this package")
+            package_dir = closure.int_deps[name]
+            init, generated = lazy.write_init(
+                package_dir, cache.get_package_files(package_dir), cache.lazy_dir(Path(self.root))
+            )
+            del add_dep_files[str(init)]
+            add_dep_files[str(generated)] = str(init.relative_to(package_dir))
+
+        # sorted, so that the same inputs always give a byte-identical wheel
+        force_include: dict[str, str] = {**build_data["force_include"], **add_dep_files}
+        build_data["force_include"] = dict(sorted(force_include.items()))
+
+    def finalize(self, version: str, build_data: dict[str, Any], artifact_path: str) -> None:
+        # only set by `una build`, which is the only thing that reuses wheels. It's worked out
+        # there, as this runs in the build environment, with its own version of hatch-una
+        fingerprint = os.environ.get(util.BUILD_FINGERPRINT_ENV)
+        if self.target_name != "wheel" or not fingerprint:
+            return
+        # keep the wheel, so `una build` can reuse it until any of its inputs change
+        cache.store_wheel(Path(self.root), fingerprint, Path(artifact_path))
 
 
 @hookimpl
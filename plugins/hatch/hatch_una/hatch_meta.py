@@ -17,26 +17,14 @@ class UnaMetaHook(MetadataHookInterface):
     def update(self, metadata: dict[str, Any]) -> None:
         print("una-meta: Injecting transitive external dependencies")
 
-        path = Path(self.root)
-        ext_deps, int_deps = util.get_dependencies(path)
-
         via_sdist = Path("PKG-INFO").exists()
         if via_sdist:
             raise ValueError("Una doesn't work for wheels built from sdist")
 
-        members: list[str] = util.get_members()
-
-        add_deps: list[str] = []
-        for dep_name in int_deps:
-            dep_path = util.find_package_dir(dep_name, members)
-
-            # load all third-party dependencies from this internal dependency into the
-            # project.dependencies table
-            dep_deps, _ = util.get_dependencies(dep_path)
-            dep_deps = [d.strip().replace(" ", "") for d in dep_deps]
-            add_deps.extend(dep_deps)
-
-        metadata["dependencies"] = list(set(ext_deps + add_deps))
+        # the third-party dependencies of this package and of every internal package
+        # it (transitively) depends on
+        closure = util.get_closure(Path(self.root))
+        metadata["dependencies"] = list(closure.ext_deps)
 
 
 @hookimpl
@@ -0,0 +1,146 @@
+"""
+Generate package `__init__` modules that only import their contents when used.
+
+An `__init__.py` that only re-exports things (eg `from .core import greet`)
+is replaced by one with a module `__getattr__` (PEP 562), so `.core` is only
+imported the first time `greet` is looked up. Submodules are loaded on first
+access too. The original imports are kept under TYPE_CHECKING for type checkers.
+"""
+
+import ast
+import os
+from pathlib import Path
+
+_HEADER = """\
+# generated by hatch-una: everything here is imported the first time it's used
+import importlib as _importlib
+from typing import TYPE_CHECKING as _TYPE_CHECKING
+"""
+
+_LOADER = """
+def __getattr__(name):
+    if name in _lazy:
+        module, attr = _lazy[name]
+        value = _importlib.import_module(module, __name__)
+        if attr is not None and value.__name__ == __name__:
+            # eg `from . import core`, looking it up here would only end up back here
+            value = _importlib.import_module(f"{__name__}.{attr}")
+        elif attr is not None:
+            try:
+                value = getattr(value, attr)
+            except AttributeError:
+                value = _importlib.import_module(f"{value.__name__}.{attr}")
+    elif name in _submodules:
+        value = _importlib.import_module(f"{__name__}.{name}")
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted({*globals(), *_lazy, *_submodules})
+"""
+
+
+def write_init(package_dir: Path, files: list[Path], out_dir: Path) -> tuple[Path, Path]:
+    """
+    Write a lazy version of the top-level `__init__.py` of the package at `package_dir`
+    (eg `myws/greeter/__init__.py`) to the same relative path in `out_dir`.
+
+    `files` are the files of the package. Returns the original and the generated file.
+    """
+    rels = [f.relative_to(package_dir) for f in files]
+    init = next(
+        (r for r in rels if r.parts[1:] == (package_dir.name, "__init__.py")),
+        None,
+    )
+    if init is None:
+        raise ValueError(f"Didn't find the __init__.py of '{package_dir.name}'")
+    pkg = init.parent
+    submodules = [r.stem for r in rels if r.parent == pkg and r.suffix == ".py"]
+    submodules += [r.parent.name for r in rels if r.parent.parent == pkg and r.name == init.name]
+    submodules.remove("__init__")
+
+    source = (package_dir / init).read_text(encoding="utf-8")
+    content = generate(source, submodules, package_dir / init)
+    out = out_dir / init
+    if not out.exists() or out.read_text(encoding="utf-8") != content:
+        out.parent.mkdir(parents=True, exist_ok=True)
+        # builds of several apps may be running at once
+        tmp = out.with_name(f".{out.name}.{os.getpid()}.tmp")
+        tmp.write_text(content, encoding="utf-8")
+        tmp.replace(out)
+    return package_dir / init, out
+
+
+def generate(source: str, submodules: list[str], path: Path) -> str:
+    """
+    A lazy version of the `__init__.py` at `path`, which contains `source`.
+
+    It can only contain a docstring, imports and assignments of constants (eg
+    `__all__`), anything else would behave differently if run later.
+    """
+    tree = ast.parse(source, str(path))
+    kept: list[str] = []
+    imports: list[str] = []
+    # name -> (module to import, attribute of it or None for the module itself)
+    lazy: dict[str, tuple[str, str | None]] = {}
+    for i, node in enumerate(tree.body):
+        segment = ast.get_source_segment(source, node) or ""
+        if isinstance(node, ast.ImportFrom) and node.module == "__future__":
+            # has to come first, and changes nothing in the generated module
+            continue
+        if isinstance(node, ast.Expr) and i == 0 and isinstance(node.value, ast.Constant):
+            kept.append(segment)
+        elif isinstance(node, ast.Assign) and _is_constant(node.value):
+            kept.append(segment)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append(segment)
+            lazy.update(_from_import(node, path))
+        elif isinstance(node, ast.Import):
+            imports.append(segment)
+            lazy.update(_import(node, path))
+        else:
+            raise ValueError(
+                f"Can't make '{path}' lazy: line {node.lineno} isn't an import or a constant"
+            )
+
+    lines = [_HEADER]
+    lines.extend(f"{k}\n" for k in kept)
+    if imports:
+        lines.append("if _TYPE_CHECKING:")
+        lines.extend(f"    {i}" for i in imports)
+        lines.append("")
+    lines.append(f"_lazy = {dict(sorted(lazy.items()))!r}")
+    lines.append(f"_submodules = {sorted(set(submodules))!r}")
+    lines.append(_LOADER)
+    return "\n".join(lines)
+
+
+def _from_import(node: ast.ImportFrom, path: Path) -> dict[str, tuple[str, str | None]]:
+    module = "." * node.level + (node.module or "")
+    res: dict[str, tuple[str, str | None]] = {}
+    for alias in node.names:
+        if alias.name == "*":
+            raise ValueError(f"Can't make '{path}' lazy: line {node.lineno} is a star import")
+        res[alias.asname or alias.name] = (module, alias.name)
+    return res
+
+
+def _import(node: ast.Import, path: Path) -> dict[str, tuple[str, str | None]]:
+    res: dict[str, tuple[str, str | None]] = {}
+    for alias in node.names:
+        if "." in alias.name and not alias.asname:
+            # binds the top-level package, which would need its own entry
+            raise ValueError(
+                f"Can't make '{path}' lazy: line {node.lineno} imports a submodule without `as`"
+            )
+        res[alias.asname or alias.name] = (alias.name, None)
+    return res
+
+
+def _is_constant(node: ast.expr) -> bool:
+    if isinstance(node, ast.List | ast.Tuple | ast.Set):
+        return all(_is_constant(e) for e in node.elts)
+    return isinstance(node, ast.Constant)
@@ -1,9 +1,43 @@
+import json
+import os
 import tomllib
+from dataclasses import dataclass
+from functools import lru_cache
 from pathlib import Path
 from typing import Any
 
 PYPROJ = "pyproject.toml"
 
+# written by una (see una.layout), which must be kept in sync
+LAYOUT_MANIFEST = ".una_cache/layout.json"
+LAYOUT_VERSION = 1
+
+# set by `una build` to a manifest with the closure of every package (see una.build)
+BUILD_MANIFEST_ENV = "UNA_BUILD_MANIFEST"
+BUILD_MANIFEST_VERSION = 1
+# set by `una build` for each package, to the fingerprint to keep its wheel under
+BUILD_FINGERPRINT_ENV = "UNA_BUILD_FINGERPRINT"
+
+
+@dataclass(frozen=True)
+class Layout:
+    root: Path
+    members: list[str]
+    # package directory name -> package directory
+    packages: dict[str, Path]
+
+
+@dataclass(frozen=True)
+class Closure:
+    # every internal package reachable from a package, dependencies first
+    int_deps: dict[str, Path]
+    # the external requirements of the package and all of int_deps
+    ext_deps: list[str]
+
+
+# shared by the metadata and build hooks, which run in the same process
+_closures: dict[Path, Closure] = {}
+
 
 def load_conf(path: Path) -> dict[str, Any]:
     with (path / PYPROJ).open("rb") as fp:
@@ -11,12 +45,7 @@ def load_conf(path: Path) -> dict[str, Any]:
 
 
 def get_members() -> list[str]:
-    root = get_workspace_root()
-    root_conf = load_conf(root)
-    members: list[str] = (
-        root_conf.get("tool", {}).get("uv", {}).get("workspace", {}).get("members", [])  # pyright:ignore[reportAny]
-    )
-    return members
+    return get_layout().members
 
 
 def get_dependencies(path: Path) -> tuple[list[str], list[str]]:
@@ -38,23 +67,130 @@ def get_dependencies(path: Path) -> tuple[list[str], list[str]]:
     return (ext_deps, int_deps)
 
 
-def find_package_dir(name: str, members: list[str]) -> Path:
-    root = get_workspace_root()
-    for glob in members:
-        packages = sorted(root.glob(glob))
-        for p in packages:
-            if p.name == name:
-                return p.resolve()
-    raise ValueError(f"Couldn't find package '{name}'")
+def get_closure(path: Path) -> Closure:
+    """
+    All the internal and external dependencies of the package at `path`, transitively.
+
+    Each package's closure is only computed once per process,
+    or not at all if `una build` has passed in a manifest with it.
+    """
+    path = path.resolve()
+    return _build_manifest().get(path) or _closure(path, ())
+
+
+@lru_cache
+def _build_manifest() -> dict[Path, Closure]:
+    manifest = os.environ.get(BUILD_MANIFEST_ENV)
+    if not manifest:
+        return {}
+    with Path(manifest).open(encoding="utf-8") as f:
+        data: dict[str, Any] = json.load(f)
+    if data.get("version") != BUILD_MANIFEST_VERSION:
+        return {}
+    packages: dict[str, dict[str, Any]] = data["packages"]
+    return {
+        Path(k): Closure({n: Path(p) for n, p in v["int_deps"].items()}, v["ext_deps"])  # pyright:ignore[reportAny]
+        for k, v in packages.items()
+    }
+
+
+def _closure(path: Path, stack: tuple[Path, ...]) -> Closure:
+    if path in _closures:
+        return _closures[path]
+    if path in stack:
+        cycle = [p.name for p in (*stack[stack.index(path) :], path)]
+        raise ValueError(f"Internal dependency cycle: {' -> '.join(cycle)}")
+
+    ext_deps, int_deps = get_dependencies(path)
+    all_int: dict[str, Path] = {}
+    all_ext = list(ext_deps)
+    for name in int_deps:
+        dep_path = find_package_dir(name)
+        dep = _closure(dep_path, (*stack, path))
+        all_int.update(dep.int_deps)
+        all_int[name] = dep_path
+        all_ext.extend(dep.ext_deps)
+
+    res = Closure(all_int, list(dict.fromkeys(all_ext)))
+    _closures[path] = res
+    return res
+
+
+def find_package_dir(name: str) -> Path:
+    try:
+        return get_layout().packages[name]
+    except KeyError:
+        raise ValueError(f"Couldn't find package '{name}'") from None
+
+
+def get_layout() -> Layout:
+    """
+    The workspace members and where each package is, computed once per process.
+
+    Uses the manifest written by `una sync` if it's up to date, otherwise globs.
+    """
+    return _get_layout(get_workspace_root())
 
 
 def get_workspace_root() -> Path:
-    root = _find_upwards(Path.cwd())
+    root = _find_root(Path.cwd())
     if not root:
         raise ValueError("Didn't find the workspace root. Expected to find a .git directory.")
     return root
 
 
+@lru_cache
+def _get_layout(root: Path) -> Layout:
+    root_conf = load_conf(root)
+    members: list[str] = (
+        root_conf.get("tool", {}).get("uv", {}).get("workspace", {}).get("members", [])  # pyright:ignore[reportAny]
+    )
+    return _read_manifest(root, members) or _scan(root, members)
+
+
+def _read_manifest(root: Path, members: list[str]) -> Layout | None:
+    try:
+        with (root / LAYOUT_MANIFEST).open(encoding="utf-8") as f:
+            data: dict[str, Any] = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != LAYOUT_VERSION or data.get("members") != members:
+        return None
+    if data.get("stamps") != _stamps(root, members):
+        return None
+    packages: dict[str, str] = data.get("packages", {})
+    return Layout(root, members, {k: (root / v).resolve() for k, v in packages.items()})
+
+
+def _scan(root: Path, members: list[str]) -> Layout:
+    packages: dict[str, Path] = {}
+    for glob in members:
+        for p in sorted(root.glob(glob)):
+            packages.setdefault(p.name, p.resolve())
+    return Layout(root, members, packages)
+
+
+def _stamps(root: Path, members: list[str]) -> dict[str, int]:
+    res: dict[str, int] = {}
+    for p in [PYPROJ, *(_glob_base(g) for g in members)]:
+        try:
+            res[p] = (root / p).stat().st_mtime_ns
+        except FileNotFoundError:
+            res[p] = 0
+    return res
+
+
+def _glob_base(glob: str) -> str:
+    parts = Path(glob).parts
+    n = next((i for i, p in enumerate(parts) if any(c in p for c in "*?[")), len(parts) - 1)
+    return Path(*parts[:n]).as_posix()
+
+
+@lru_cache
+def _find_root(cwd: Path) -> Path | None:
+    return _find_upwards(cwd)
+
+
 def _find_upwards(cwd: Path) -> Path | None:
     if cwd == Path(cwd.root) or cwd == cwd.parent:
         return None
@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+from una import files
+
+_ROOT_PYPROJ = """\
+[project]
+name = "myws"
+version = "0"
+requires-python = ">=3.11"
+dependencies = []
+
+[tool.uv]
+dev-dependencies = []
+"""
+
+
+@pytest.fixture
+def workspace(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """An example workspace, as created by `una create workspace`, with cwd set to it."""
+    (tmp_path / ".git").mkdir()
+    (tmp_path / "pyproject.toml").write_text(_ROOT_PYPROJ, encoding="utf-8")
+    files.create_workspace(tmp_path)
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
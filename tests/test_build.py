@@ -0,0 +1,95 @@
+import subprocess
+from pathlib import Path
+
+import pytest
+from hatch_una import cache, util
+
+from una import build, files, package_deps
+from una.types import BuildResult, PackageDeps
+
+
+def test_closures_match_hatch(workspace: Path):
+    files.create_package(
+        workspace, "myws", "top", "apps", "", '"printer"', "printer = { workspace = true }"
+    )
+    confs = package_deps.get_package_confs(workspace)
+    closures = build.get_closures(confs)
+    for c in confs:
+        expected = util.get_closure(c.path)
+        assert closures[c.path.resolve()] == (expected.int_deps, expected.ext_deps)
+
+
+def test_hatch_uses_manifest(workspace: Path, monkeypatch: pytest.MonkeyPatch):
+    confs = package_deps.get_package_confs(workspace)
+    manifest = build.write_manifest(workspace, confs)
+    monkeypatch.setenv(build.MANIFEST_ENV, str(manifest))
+    util._build_manifest.cache_clear()  # pyright:ignore[reportPrivateUsage]
+    # the manifest is used as is, without reading the package's pyproject.toml
+    monkeypatch.setattr(util, "get_dependencies", None)
+    closure = util.get_closure(workspace / "apps" / "printer")
+    assert list(closure.int_deps) == ["greeter"]
+    util._build_manifest.cache_clear()  # pyright:ignore[reportPrivateUsage]
+
+
+def test_build_all_order(workspace: Path, monkeypatch: pytest.MonkeyPatch):
+    built: list[str] = []
+
+    def fake_build(
+        package: PackageDeps, version: str | None, out_dir: Path, env: dict[str, str]
+    ) -> BuildResult:
+        assert build.MANIFEST_ENV in env
+        built.append(package.path.name)
+        return BuildResult(package, ok=package.path.name != "greeter")
+
+    monkeypatch.setattr(build, "_build", fake_build)
+    confs = package_deps.get_package_confs(workspace)
+    packages = package_deps.get_packages(confs)
+    results = build.build_all(workspace, confs, packages, workspace / "dist", jobs=2)
+    # printer depends on greeter, which failed
+    assert built == ["greeter"]
+    assert {r.package.path.name: r.skipped for r in results} == {"printer": True, "greeter": False}
+
+
+def test_build_reuses_cached_wheel(workspace: Path, monkeypatch: pytest.MonkeyPatch):
+    printer = workspace / "apps" / "printer"
+    wheel = workspace / "printer-0.1.0-py3-none-any.whl"
+    wheel.write_bytes(b"wheel")
+    cache.store_wheel(printer, cache.fingerprint(printer, "0.1.0"), wheel)
+
+    package = next(
+        p
+        for p in package_deps.get_packages(package_deps.get_package_confs(workspace))
+        if p.path.name == "printer"
+    )
+    res = build._build(package, "0.1.0", workspace / "dist", {})  # pyright:ignore[reportPrivateUsage]
+    assert res.reused
+    assert (workspace / "dist" / wheel.name).read_bytes() == b"wheel"
+
+    # any change to the inputs, here in an internal dependency, means a new fingerprint
+    (workspace / "libs" / "greeter" / "myws" / "greeter" / "__init__.py").write_text("x = 1\n")
+    fingerprint = cache.fingerprint(printer, "0.1.0")
+    assert cache.get_wheel(printer, fingerprint) is None
+
+    # so it's built, and the hooks are told what to keep the wheel under
+    envs: list[dict[str, str]] = []
+
+    def fake_run(args: list[str], env: dict[str, str], **kwargs: object):
+        envs.append(env)
+        return subprocess.CompletedProcess(args, 0, "", "")
+
+    monkeypatch.setattr(subprocess, "run", fake_run)
+    res = build._build(package, "0.1.0", workspace / "dist", {})  # pyright:ignore[reportPrivateUsage]
+    assert not res.reused
+    assert envs == [{build.FINGERPRINT_ENV: fingerprint}]
+
+    # a wheel that has changed since it was stored isn't reused
+    cache.store_wheel(printer, fingerprint, wheel)
+    stored = cache.get_wheel(printer, fingerprint)
+    assert stored is not None
+    stored.write_bytes(b"other")
+    assert cache.get_wheel(printer, fingerprint) is None
+
+    # only the latest wheel of each package is kept
+    cache.store_wheel(printer, fingerprint, wheel)
+    wheels = workspace / ".una_cache" / "wheels" / "printer"
+    assert [d.name for d in wheels.iterdir()] == [fingerprint]
@@ -0,0 +1,97 @@
+import json
+import os
+from pathlib import Path
+
+import pytest
+
+from una import cache, consts, parse
+
+
+def _write(path: Path, content: str) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(content, encoding="utf-8")
+    return path
+
+
+def test_cache_roundtrip(tmp_path: Path):
+    _write(tmp_path / "pkg" / "a.py", "import foo\nfrom bar import baz\n")
+    c = cache.ImportCache.load(tmp_path)
+    assert parse.fetch_all_imports({tmp_path / "pkg"}, c) == {"pkg": {"foo", "bar.baz"}}
+    assert (c.hits, c.misses) == (0, 1)
+    c.save()
+
+    c = cache.ImportCache.load(tmp_path)
+    assert parse.fetch_all_imports({tmp_path / "pkg"}, c) == {"pkg": {"foo", "bar.baz"}}
+    assert (c.hits, c.misses) == (1, 0)
+
+
+def test_cache_invalidated_by_change(tmp_path: Path):
+    f = _write(tmp_path / "pkg" / "a.py", "import foo\n")
+    c = cache.ImportCache.load(tmp_path)
+    parse.fetch_all_imports({tmp_path / "pkg"}, c)
+    c.save()
+
+    _write(f, "import another\n")
+    c = cache.ImportCache.load(tmp_path)
+    assert parse.fetch_all_imports({tmp_path / "pkg"}, c) == {"pkg": {"another"}}
+    assert c.misses == 1
+
+
+def test_cache_file_written_while_parsed(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    f = _write(tmp_path / "pkg" / "a.py", "import foo\n")
+    extract = parse._extract_imports  # pyright:ignore[reportPrivateUsage]
+
+    def extract_then_write(path: Path):
+        res = extract(path)
+        # eg an editor writing the rest of the file
+        _write(f, "import foo\nimport bar\n")
+        return res
+
+    monkeypatch.setitem(parse._ENGINES, parse.Engine.AST, extract_then_write)  # pyright:ignore[reportPrivateUsage]
+    c = cache.ImportCache.load(tmp_path)
+    assert parse.fetch_all_imports({tmp_path / "pkg"}, c) == {"pkg": {"foo"}}
+    monkeypatch.undo()
+    # the stored entry is for what was parsed, so the new content is parsed again
+    assert parse.fetch_all_imports({tmp_path / "pkg"}, c) == {"pkg": {"foo", "bar"}}
+
+
+def test_cache_hash_survives_touch(tmp_path: Path):
+    f = _write(tmp_path / "pkg" / "a.py", "import foo\n")
+    c = cache.ImportCache.load(tmp_path, use_hash=True)
+    parse.fetch_all_imports({tmp_path / "pkg"}, c)
+    c.save()
+
+    stat = f.stat()
+    os.utime(f, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+    c = cache.ImportCache.load(tmp_path, use_hash=True)
+    assert parse.fetch_all_imports({tmp_path / "pkg"}, c) == {"pkg": {"foo"}}
+    assert (c.hits, c.misses) == (1, 0)
+
+
+def test_cache_drops_deleted_files(tmp_path: Path):
+    _write(tmp_path / "pkg" / "a.py", "import foo\n")
+    renamed = _write(tmp_path / "pkg" / "b.py", "import bar\n")
+    _write(tmp_path / "other" / "c.py", "import baz\n")
+    c = cache.ImportCache.load(tmp_path)
+    parse.fetch_all_imports({tmp_path / "pkg", tmp_path / "other"}, c)
+    c.save()
+
+    renamed.rename(tmp_path / "pkg" / "d.py")
+    c = cache.ImportCache.load(tmp_path)
+    # "other" isn't looked up in this run, but its file still exists
+    assert parse.fetch_all_imports({tmp_path / "pkg"}, c) == {"pkg": {"foo", "bar"}}
+    c.save()
+    assert set(cache.ImportCache.load(tmp_path).entries) == {"pkg/a.py", "pkg/d.py", "other/c.py"}
+
+
+def test_cache_dropped_on_version_change(tmp_path: Path):
+    _write(tmp_path / "pkg" / "a.py", "import foo\n")
+    c = cache.ImportCache.load(tmp_path)
+    parse.fetch_all_imports({tmp_path / "pkg"}, c)
+    c.save()
+
+    cache_file = tmp_path / consts.CACHE_DIR / cache.CACHE_FILE
+    data = json.loads(cache_file.read_text())
+    data["version"] = "una-0.0.0-py3.0.0"
+    cache_file.write_text(json.dumps(data))
+    assert cache.ImportCache.load(tmp_path).entries == {}
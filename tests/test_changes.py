@@ -0,0 +1,28 @@
+from pathlib import Path
+
+from una import changes, check, package_deps
+from una.workspace import WorkspaceGraph
+
+
+def test_affected_packages(workspace: Path):
+    graph = WorkspaceGraph.build(workspace, "myws")
+    packages = package_deps.get_packages(graph.confs)
+    previous = {p.name: check.check_package_deps(graph, p, []) for p in packages}
+
+    lib_file = workspace / "libs/greeter/myws/greeter/__init__.py"
+    owners = changes.owning_packages(workspace, [lib_file], packages) or set()
+    assert owners == {"greeter"}
+    # printer depends on greeter, so it must be re-checked too
+    assert changes.affected_packages(owners, packages, previous) == {"greeter", "printer"}
+
+    app_file = workspace / "apps/printer/pyproject.toml"
+    owners = changes.owning_packages(workspace, [app_file], packages)
+    assert changes.affected_packages(owners or set(), packages, previous) == {"printer"}
+
+
+def test_root_changes_affect_everything(workspace: Path):
+    graph = WorkspaceGraph.build(workspace, "myws")
+    packages = package_deps.get_packages(graph.confs)
+    files = [workspace / "README.md", workspace / "uv.lock"]
+    assert changes.owning_packages(workspace, files[:1], packages) == set()
+    assert changes.owning_packages(workspace, files, packages) is None
@@ -0,0 +1,109 @@
+# pyright: reportPrivateUsage=false
+from pathlib import Path
+
+from una import check, distributions, files, package_deps
+from una.types import ExtDep
+from una.workspace import WorkspaceGraph
+
+
+def _add_import(path: Path, line: str) -> None:
+    with path.open("a", encoding="utf-8") as f:
+        f.write(f"\n{line}\n")
+
+
+def test_check_transitive_int_deps(workspace: Path):
+    files.create_package(workspace, "myws", "extra", "libs", "", "", "")
+    _add_import(workspace / "libs/greeter/myws/greeter/__init__.py", "from myws import extra")
+
+    graph = WorkspaceGraph.build(workspace, "myws")
+    diffs = {
+        p.name: check.check_package_deps(graph, p, [])
+        for p in package_deps.get_packages(graph.confs)
+    }
+    # each package's tests import the package itself
+    assert diffs["printer"].int_dep_imports == {
+        "greeter": {"greeter", "extra"},
+        "extra": {"extra"},
+    }
+    assert diffs["printer"].int_dep_diff == {"extra"}
+    assert diffs["greeter"].int_dep_diff == set()
+    assert diffs["extra"].int_dep_diff == set()
+
+
+def test_graph_parses_each_package_once(workspace: Path):
+    graph = WorkspaceGraph.build(workspace, "myws")
+    assert graph.int_deps("printer") == {"printer", "greeter"}
+    assert graph.imports("greeter") is graph.imports("greeter")
+    assert graph.int_dep_imports({"printer"}) == {
+        "printer": {"printer", "greeter"},
+        "greeter": {"greeter"},
+    }
+
+
+def test_exact_match_is_normalized():
+    imports = {"pkg": {"PIL", "typing_extensions", "zope.interface", "missing"}}
+    deps = {"pil", "typing-extensions", "zope-interface"}
+    assert check._ext_dep_diff(imports, deps) == {"missing"}
+
+
+def test_fuzzy_match_is_opt_in():
+    imports = {"pkg": {"yaml", "totally_unrelated"}}
+    deps = {"pyyaml"}
+    assert check._ext_dep_diff(imports, deps) == {"yaml", "totally_unrelated"}
+    assert check._ext_dep_diff(imports, deps, fuzzy=True) == {"totally_unrelated"}
+
+
+def test_unused_deps(workspace: Path):
+    files.create_package(workspace, "myws", "extra", "libs", "", "", "")
+    pyproj = workspace / "apps/printer/pyproject.toml"
+    content = pyproj.read_text().replace('"greeter"', '"greeter", "extra", "typer>=0.9"')
+    pyproj.write_text(
+        content.replace("[tool.uv.sources]", "[tool.uv.sources]\nextra = { workspace = true }")
+    )
+
+    graph = WorkspaceGraph.build(workspace, "myws")
+    printer = next(p for p in package_deps.get_packages(graph.confs) if p.name == "printer")
+    assert check.check_package_deps(graph, printer, [], unused=True).unused_deps == {
+        "extra",
+        "typer",
+    }
+    assert check.check_package_deps(graph, printer, []).unused_deps == set()
+
+    # needed by greeter, so printer has to declare it
+    _add_import(workspace / "libs/greeter/myws/greeter/__init__.py", "from myws import extra")
+    _add_import(workspace / "apps/printer/myws/printer/__init__.py", "import typer")
+    graph = WorkspaceGraph.build(workspace, "myws")
+    assert check.check_package_deps(graph, printer, [], unused=True).unused_deps == set()
+
+
+def test_unused_deps_only_resolvable(workspace: Path):
+    pyproj = workspace / "apps/printer/pyproject.toml"
+    deps = '"greeter", "pyYAML>=6", "pywin32>=300; sys_platform == \'win32\'", "notinstalled"'
+    pyproj.write_text(pyproj.read_text().replace('"greeter"', deps))
+    module = workspace / "apps/printer/myws/printer/__init__.py"
+    _add_import(module, "import yaml")
+    _add_import(module, "import win32api")
+
+    graph = WorkspaceGraph.build(workspace, "myws")
+    printer = next(p for p in package_deps.get_packages(graph.confs) if p.name == "printer")
+    assert {d.name for d in printer.ext_deps} == {"pyYAML", "pywin32", "notinstalled"}
+    # PyYAML is installed, and imported however it's spelled, the others can't be looked up
+    assert check.check_package_deps(graph, printer, [], unused=True).unused_deps == set()
+
+
+def test_dist_lookup_ignores_spelling():
+    index = distributions.DistIndex(
+        packages={"pyyaml": ["yaml"]}, sub_packages={}, provides={"pyyaml": ["_yaml", "yaml"]}
+    )
+    imports = {"pkg": {"yaml", "cv2"}}
+    for spelling in ["PyYAML", "pyYAML", "PyYaml", "pyyaml"]:
+        deps = distributions.collect_deps([ExtDep(spelling, "")], [], index)
+        assert check._ext_dep_diff(imports, deps) == {"cv2"}, spelling
+    # the known and custom aliases too
+    empty = distributions.DistIndex({}, {}, {})
+    deps = distributions.collect_deps(
+        [ExtDep("PyYaml", ""), ExtDep("OpenCV_Python", "")], [], empty
+    )
+    assert check._ext_dep_diff(imports, deps) == set()
+    deps = distributions.collect_deps([ExtDep("My.Yaml", "")], ["my-yaml=yaml"], empty)
+    assert check._ext_dep_diff({"pkg": {"yaml"}}, deps) == set()
@@ -0,0 +1,156 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+from typer.testing import CliRunner
+
+from una import files
+from una.cli import app
+
+runner = CliRunner()
+
+
+def test_sync_ndjson(workspace: Path):
+    res = runner.invoke(app, ["sync", "--check-only", "--format", "ndjson", "--jobs", "1"])
+    assert res.exit_code == 0, res.output
+    records = [json.loads(line) for line in res.output.splitlines()]
+    assert {r["package"] for r in records} == {"printer", "greeter"}
+    printer = next(r for r in records if r["package"] == "printer")
+    assert printer["int_dep_imports"] == {"greeter": ["greeter"]}
+    assert printer["int_dep_diff"] == []
+    assert {"conf", "glob", "parse", "dists", "diff"} <= printer["timings"].keys()
+
+
+def test_sync_json_is_valid(workspace: Path):
+    res = runner.invoke(app, ["sync", "--check-only", "--format", "json", "--jobs", "1"])
+    assert res.exit_code == 0, res.output
+    assert len(json.loads(res.output)) == 2
+
+
+def test_profile_output(workspace: Path, tmp_path: Path):
+    trace = tmp_path / "trace.json"
+    res = runner.invoke(
+        app, ["--profile", "--profile-output", str(trace), "sync", "--check-only", "--jobs", "1"]
+    )
+    assert res.exit_code == 0, res.output
+    events = json.loads(trace.read_text())["traceEvents"]
+    assert {"conf", "glob", "parse", "dists", "diff"} <= {e["name"] for e in events}
+    assert all(e["ph"] == "X" and e["dur"] >= 0 for e in events)
+
+
+def _import_times(*args: str) -> dict[str, int]:
+    """Self import time in microseconds of each module imported by `una *args`."""
+    res = subprocess.run(
+        [sys.executable, "-X", "importtime", "-m", "una", *args], capture_output=True, text=True
+    )
+    times: dict[str, int] = {}
+    for line in res.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, _, name = line.removeprefix("import time:").split("|")
+        if self_us.strip().isdigit():
+            times[name.strip()] = int(self_us)
+    return times
+
+
+def test_help_import_time():
+    times = _import_times("--help")
+    assert "una.cli" in times
+    # only loaded by the commands that need them
+    assert not {"tomlkit", "difflib", "una.types", "una.check"} & times.keys()
+    # a generous budget, to catch eg a heavy dependency being imported eagerly again
+    assert sum(times.values()) < 1_500_000
+
+
+def test_sync_import_time(workspace: Path):
+    times = _import_times("sync", "--check-only")
+    assert "una.check" in times
+    # tomlkit is only needed to modify files
+    assert not {"tomlkit", "difflib"} & times.keys()
+    assert sum(times.values()) < 2_500_000
+
+
+def test_sync_select_package(workspace: Path):
+    args = ["sync", "--check-only", "--format", "ndjson", "--jobs", "1", "-p", "libs/*"]
+    res = runner.invoke(app, args)
+    assert res.exit_code == 0, res.output
+    assert [json.loads(line)["package"] for line in res.output.splitlines()] == ["greeter"]
+
+
+def test_sync_explain(workspace: Path):
+    # printer depends on greeter, so it's missing whatever greeter imports
+    module = next(workspace.glob("libs/greeter/*/greeter")) / "extra.py"
+    module.write_text("import os\n\ndef f():\n    import myws.extra.things\n", encoding="utf-8")
+    args = ["sync", "--check-only", "--format", "ndjson", "--jobs", "1", "--explain"]
+    res = runner.invoke(app, args)
+    assert res.exit_code == 1, res.output
+    printer = next(json.loads(line) for line in res.output.splitlines() if "printer" in line)
+    location = f"{module.relative_to(workspace).as_posix()}:4:5"
+    assert printer["explain"] == {"extra": [{"location": location, "import": "myws.extra.things"}]}
+
+    res = runner.invoke(app, ["sync", "--check-only", "--jobs", "1", "--explain"])
+    assert f"  {location} myws.extra.things" in res.output
+
+
+def test_graph_dot(workspace: Path):
+    res = runner.invoke(app, ["graph", "--format", "dot", "--jobs", "1"])
+    assert res.exit_code == 0, res.output
+    assert '"myws.printer" -> "myws.greeter";' in res.output
+
+
+def test_sync_prune(workspace: Path):
+    pyproj = workspace / "libs/greeter/pyproject.toml"
+    pyproj.write_text(
+        pyproj.read_text().replace("dependencies = [", 'dependencies = ["typer", ', 1)
+    )
+    res = runner.invoke(app, ["sync", "--check-only", "--check-unused", "--jobs", "1"])
+    assert res.exit_code == 1
+    assert "greeter doesn't import: typer" in res.output
+
+    res = runner.invoke(app, ["sync", "--prune", "--jobs", "1"])
+    assert res.exit_code == 0, res.output
+    assert "greeter removing unused dep typer" in res.output
+    assert "typer" not in pyproj.read_text()
+    # not installed, so whether it's imported can't be told
+    assert "cowsay-python" in pyproj.read_text()
+
+
+def test_changed_since_outside_selection(workspace: Path):
+    files.create_package(workspace, "myws", "extra", "libs", "", "", "")
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@t", "-C", str(workspace)]
+    subprocess.run([*git, "init", "-q"], check=True)
+    subprocess.run([*git, "add", "-A"], check=True)
+    subprocess.run([*git, "commit", "-qm", "init"], check=True)
+    assert runner.invoke(app, ["sync", "--check-only", "--all", "--jobs", "1"]).exit_code == 0
+
+    # greeter isn't selected, but printer depends on it
+    with (workspace / "libs/greeter/myws/greeter/__init__.py").open("a") as f:
+        f.write("\nfrom myws import extra\n")
+    args = ["sync", "--check-only", "-p", "printer", "--changed-since", "HEAD", "--jobs", "1"]
+    res = runner.invoke(app, args)
+    assert res.exit_code == 1, res.output
+    assert "can't find internal: extra" in res.output
+
+
+def test_changed_since_after_commit(workspace: Path):
+    files.create_package(workspace, "myws", "extra", "libs", "", "", "")
+    git = ["git", "-c", "user.name=t", "-c", "user.email=t@t", "-C", str(workspace)]
+    subprocess.run([*git, "init", "-q"], check=True)
+    subprocess.run([*git, "add", "-A"], check=True)
+    subprocess.run([*git, "commit", "-qm", "A"], check=True)
+    assert runner.invoke(app, ["sync", "--check-only", "--all", "--jobs", "1"]).exit_code == 0
+
+    # the results were saved before HEAD, so this change isn't in `git diff HEAD`
+    with (workspace / "libs/greeter/myws/greeter/__init__.py").open("a") as f:
+        f.write("\nfrom myws import extra\n")
+    subprocess.run([*git, "commit", "-qam", "B"], check=True)
+    args = ["sync", "--check-only", "--all", "--changed-since", "HEAD", "--jobs", "1"]
+    res = runner.invoke(app, args)
+    assert res.exit_code == 1, res.output
+    assert "printer can't find internal: extra" in res.output.replace("\n", " ")
+
+    # nothing has changed since these results were saved
+    args = ["sync", "--check-only", "--all", "--changed-since", "HEAD", "--format", "ndjson"]
+    res = runner.invoke(app, [*args, "--jobs", "1"])
+    assert all(json.loads(line)["reused"] for line in res.output.splitlines())
@@ -2,8 +2,10 @@
 
 # pyright: reportPrivateUsage=false
 import importlib.metadata
+from pathlib import Path
 
-from una import distributions
+from una import consts, distributions
+from una.types import ExtDep
 
 
 class FakeDist:
@@ -85,3 +87,40 @@ def test_pick_empty_alias_by_keys():
     keys = {"one", "two", "opencv-python", "matplotlib", "three"}
     res = distributions._pick_alias(aliases, keys)
     assert res == set()
+
+
+def test_index_provides_import_names():
+    index = distributions.get_index()
+    assert "typer" in index.provides["typer"]
+    assert "rich" in index.sub_packages["typer"]
+
+
+def test_index_persisted(tmp_path: Path):
+    index = distributions.get_index(tmp_path)
+    assert (tmp_path / consts.CACHE_DIR / distributions.DISTS_FILE).exists()
+    distributions.get_index.cache_clear()
+    assert distributions.get_index(tmp_path) == index
+
+
+def test_collect_deps_uses_index():
+    index = distributions.DistIndex(
+        packages={"python-jose": ["jose"]},
+        sub_packages={"fastapi": ["starlette"]},
+        provides={"opentelemetry-api": ["opentelemetry", "opentelemetry-api"]},
+    )
+    deps = [ExtDep("python-jose", ""), ExtDep("fastapi", ""), ExtDep("opentelemetry-api", "")]
+    res = distributions.collect_deps(deps, [], index)
+    assert res == {
+        "python-jose",
+        "jose",
+        "fastapi",
+        "starlette",
+        "opentelemetry-api",
+        "opentelemetry",
+    }
+
+
+def test_index_keys_are_normalized():
+    index = distributions.get_index()
+    assert "typing-extensions" in index.provides
+    assert not [k for k in index.provides if k != distributions.normalize(k)]
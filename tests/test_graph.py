@@ -0,0 +1,65 @@
+import json
+from pathlib import Path
+
+from una import graph
+from una.cache import ImportCache
+from una.workspace import WorkspaceGraph
+
+
+def _module(workspace: Path, package: str, name: str, content: str) -> None:
+    path = next(workspace.glob(f"*/{package}/myws/{package}")) / f"{name}.py"
+    path.write_text(content, encoding="utf-8")
+
+
+def test_module_graph(workspace: Path):
+    _module(workspace, "greeter", "core", "from myws.greeter.util import helper\n")
+    _module(workspace, "greeter", "util", "import os\nimport myws.greeter.core\n")
+    _module(workspace, "printer", "main", "from myws.greeter.core import greet\n")
+    cache = ImportCache.load(workspace)
+    ws = WorkspaceGraph.build(workspace, "myws", cache)
+    modules = graph.build_module_graph(ws)
+
+    assert modules.packages["myws.greeter.core"] == "greeter"
+    assert modules.modules["myws.greeter"] == Path("libs/greeter/myws/greeter/__init__.py")
+    assert modules.edges["myws.printer.main"] == {"myws.greeter.core"}
+    assert modules.edges["myws.greeter.core"] == {"myws.greeter.util"}
+    # tests aren't importable, so aren't part of the graph
+    assert not any(m.startswith("tests") for m in modules.modules)
+
+    metrics = graph.get_metrics(modules)
+    assert metrics.fan_in["myws.greeter.core"] == 2
+    assert metrics.fan_out["myws.printer"] == 1
+    assert metrics.cycles == [["myws.greeter.core", "myws.greeter.util"]]
+    # the greeter.core/util cycle only counts once
+    assert len(metrics.longest_chain) == 2
+
+    data = json.loads(graph.to_json(modules, metrics))
+    assert ["myws.printer", "myws.greeter"] in data["edges"]
+    assert '"myws.printer.main" -> "myws.greeter.core";' in graph.to_dot(modules, metrics)
+    assert 'source="myws.printer" target="myws.greeter"' in graph.to_graphml(modules, metrics)
+
+    # built again from the import cache
+    cache.hits = cache.misses = 0
+    assert graph.build_module_graph(WorkspaceGraph.build(workspace, "myws", cache)) == modules
+    assert cache.misses == 0
+
+
+def test_relative_imports(workspace: Path):
+    init = workspace / "libs" / "greeter" / "myws" / "greeter" / "__init__.py"
+    init.write_text("from .core import hello\nfrom . import util\n", encoding="utf-8")
+    _module(workspace, "greeter", "core", "def hello():\n    pass\n")
+    _module(workspace, "greeter", "util", "from ..greeter.core import hello\n")
+    ws = WorkspaceGraph.build(workspace, "myws", ImportCache.load(workspace))
+    modules = graph.build_module_graph(ws)
+
+    assert modules.edges["myws.greeter"] == {"myws.greeter.core", "myws.greeter.util"}
+    assert modules.edges["myws.greeter.util"] == {"myws.greeter.core"}
+    # the other commands still only see absolute imports
+    assert not any(i.startswith(".") for i in ws.imports("greeter"))
+
+
+def test_longest_chain():
+    edges = {"a": {"b", "c"}, "b": {"d"}, "c": set(), "d": {"e"}, "e": {"d"}}
+    sccs = graph._sccs(edges)  # pyright:ignore[reportPrivateUsage]
+    assert sccs == [["d", "e"], ["b"], ["c"], ["a"]]
+    assert graph._longest_chain(edges, sccs) == ["a", "b", "d"]  # pyright:ignore[reportPrivateUsage]
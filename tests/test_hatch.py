@@ -0,0 +1,156 @@
+import importlib
+import json
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+import pytest
+from hatch_una import cache, lazy, util
+from hatch_una.hatch_build import UnaBuildHook
+
+from una import files
+
+
+def _add(ws: Path, name: str, deps: list[str], ext: str = ""):
+    dependencies = ", ".join(f'"{d}"' for d in [*deps, *([ext] if ext else [])])
+    sources = "\n".join(f"{d} = {{ workspace = true }}" for d in deps)
+    files.create_package(ws, "myws", name, "libs", "", dependencies, sources)
+
+
+def test_closure_is_transitive(workspace: Path):
+    _add(workspace, "top", ["printer"], ext="rich>=13")
+    closure = util.get_closure(workspace / "libs" / "top")
+    # dependencies come before the packages that need them
+    assert list(closure.int_deps) == ["greeter", "printer"]
+    assert closure.int_deps["greeter"] == (workspace / "libs" / "greeter").resolve()
+    assert closure.ext_deps == ["rich>=13", "cowsay-python==1.0.2"]
+
+
+def test_closure_cycle(workspace: Path):
+    _add(workspace, "one", ["two"])
+    _add(workspace, "two", ["one"])
+    with pytest.raises(ValueError, match="one -> two -> one"):
+        util.get_closure(workspace / "libs" / "one")
+
+
+def test_package_files_cached(workspace: Path, monkeypatch: pytest.MonkeyPatch):
+    greeter = (workspace / "libs" / "greeter").resolve()
+    found = cache.get_package_files(greeter)
+    assert greeter / "myws" / "greeter" / "__init__.py" in found
+
+    # a new process would only have the cache on disk
+    cache._package_files.cache_clear()  # pyright:ignore[reportPrivateUsage]
+    with monkeypatch.context() as m:
+        m.setattr(cache, "SdistBuilder", None)
+        assert cache.get_package_files(greeter) == found
+
+    # adding a file changes the directory mtime, so the files are selected again
+    (greeter / "myws" / "greeter" / "new.py").touch()
+    assert greeter / "myws" / "greeter" / "new.py" in cache.get_package_files(greeter)
+
+
+_LAZY_INIT = '''\
+"""Greetings."""
+
+from __future__ import annotations
+
+import json as serializer
+from . import core
+from .heavy import expensive, other as renamed
+from myws.greeter.core import greet
+
+__all__ = ["greet", "expensive"]
+'''
+
+
+def test_lazy_init(workspace: Path, monkeypatch: pytest.MonkeyPatch):
+    greeter = (workspace / "libs" / "greeter").resolve()
+    module_dir = greeter / "myws" / "greeter"
+    (module_dir / "__init__.py").write_text(_LAZY_INIT, encoding="utf-8")
+    (module_dir / "core.py").write_text("def greet():\n    return 'hi'\n", encoding="utf-8")
+    heavy = "import sys\nsys.heavy_loaded = True\nexpensive = 1\nother = 2\n"
+    (module_dir / "heavy.py").write_text(heavy, encoding="utf-8")
+    (module_dir / "sub").mkdir()
+    (module_dir / "sub" / "__init__.py").write_text("x = 3\n", encoding="utf-8")
+
+    out = workspace / "out"
+    init, generated = lazy.write_init(greeter, cache.get_package_files(greeter), out)
+    assert init == module_dir / "__init__.py"
+    assert generated == out / "myws" / "greeter" / "__init__.py"
+    assert '"""Greetings."""' in generated.read_text()
+
+    monkeypatch.syspath_prepend(str(out))
+    monkeypatch.setattr(sys, "modules", dict(sys.modules))
+    # submodules are found next to the original
+    mod = importlib.import_module("myws.greeter")
+    mod.__path__.append(str(module_dir))
+    assert mod.__all__ == ["greet", "expensive"]
+    assert not hasattr(sys, "heavy_loaded")
+    assert mod.greet() == "hi"
+    assert mod.core.greet is mod.greet
+    assert not hasattr(sys, "heavy_loaded")
+    assert (mod.expensive, mod.renamed) == (1, 2)
+    assert getattr(sys, "heavy_loaded")
+    assert mod.sub.x == 3
+    assert mod.serializer is json
+    assert {"greet", "sub", "core"} <= set(dir(mod))
+    with pytest.raises(AttributeError):
+        _ = mod.missing
+    monkeypatch.delattr(sys, "heavy_loaded")
+
+
+def test_lazy_init_rejects_code():
+    with pytest.raises(ValueError, match="line 3 isn't an import"):
+        lazy.generate("import os\n\nprint(os.name)\n", [], Path("x/__init__.py"))
+
+
+def test_build_hook_lazy(workspace: Path):
+    module_dir = workspace / "libs" / "greeter" / "myws" / "greeter"
+    (module_dir / "__init__.py").write_text("from .core import greet\n", encoding="utf-8")
+    (module_dir / "core.py").write_text("def greet():\n    return 'hi'\n", encoding="utf-8")
+    printer = workspace / "apps" / "printer"
+
+    hook = UnaBuildHook(str(printer), {"lazy": ["greeter"]}, None, None, "dist", "wheel")  # pyright:ignore[reportArgumentType]
+    build_data: dict[str, Any] = {"force_include": {}}
+    hook.initialize("standard", build_data)
+    included = {v: Path(k) for k, v in build_data["force_include"].items()}
+    generated = included["myws/greeter/__init__.py"]
+    assert generated.is_relative_to(workspace / ".una_cache" / "lazy" / "printer")
+    assert "def __getattr__" in generated.read_text()
+    assert included["myws/greeter/core.py"] == (module_dir / "core.py").resolve()
+
+    hook = UnaBuildHook(str(printer), {"lazy": ["nope"]}, None, None, "dist", "wheel")  # pyright:ignore[reportArgumentType]
+    with pytest.raises(ValueError, match="'nope' in lazy"):
+        hook.initialize("standard", {"force_include": {}})
+
+
+def test_build_hook_keeps_wheel_only_for_una_build(
+    workspace: Path, monkeypatch: pytest.MonkeyPatch
+):
+    printer = workspace / "apps" / "printer"
+    wheel = workspace / "printer-0.1.0-py3-none-any.whl"
+    wheel.write_bytes(b"wheel")
+    hook = UnaBuildHook(str(printer), {}, None, None, "dist", "wheel")  # pyright:ignore[reportArgumentType]
+
+    # eg a plain `uv build`
+    monkeypatch.delenv(util.BUILD_FINGERPRINT_ENV, raising=False)
+    hook.finalize("standard", {}, str(wheel))
+    assert not (workspace / ".una_cache" / "wheels").exists()
+
+    monkeypatch.setenv(util.BUILD_FINGERPRINT_ENV, "abc")
+    hook.finalize("standard", {}, str(wheel))
+    assert (
+        cache.get_wheel(printer, "abc") == workspace / ".una_cache/wheels/printer/abc" / wheel.name
+    )
+
+
+def test_package_files_cached_from_threads(workspace: Path):
+    # `una build` fingerprints packages on several threads of one process
+    for i in range(24):
+        _add(workspace, f"lib{i}", [])
+    dirs = [(workspace / "libs" / f"lib{i}").resolve() for i in range(24)]
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        found = list(pool.map(cache.get_package_files, dirs))
+    assert all(d / "pyproject.toml" in f for d, f in zip(dirs, found, strict=True))
+    assert not list((workspace / cache.CACHE_DIR).glob("*.tmp"))
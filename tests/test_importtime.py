@@ -0,0 +1,41 @@
+# pyright: reportPrivateUsage=false
+from pathlib import Path
+
+from una import files, importtime
+
+_OUTPUT = f"""\
+import time: self [us] | cumulative | imported package
+import time:       100 |        100 | site
+{importtime._MARKER}
+import time:        50 |         50 |       json.decoder
+import time:        20 |         70 |     json
+import time:        30 |        100 |   somedist_module
+import time:        10 |         10 |     myws.util
+import time:         5 |        115 |   myws.greeter
+import time:       200 |        315 | myws.printer
+"""
+
+
+def test_parse_importtime():
+    times = importtime.parse_importtime(_OUTPUT)
+    assert [t.module for t in times][:2] == ["json.decoder", "json"]
+    assert times[0] == importtime.ImportTime("json.decoder", 50, 50, 3)
+    assert times[-1].level == 0
+
+
+def test_attribute():
+    costs = importtime.attribute(importtime.parse_importtime(_OUTPUT), "myws")
+    by_owner = {c.owner: c for c in costs}
+    assert [c.owner for c in costs] == ["printer", "stdlib", "somedist_module", "util", "greeter"]
+    assert by_owner["stdlib"].self_us == 70
+    assert by_owner["stdlib"].modules == 2
+    assert by_owner["greeter"].cumulative_us == 115
+    assert by_owner["somedist_module"].kind == "external"
+
+
+def test_measure(workspace: Path):
+    files.create_package(workspace, "myws", "extra", "libs", "", "", "")
+    times = importtime.measure(
+        importtime.default_python(workspace), ["myws.extra"], [workspace / "libs/extra"], workspace
+    )
+    assert [t.module for t in times] == ["myws", "myws.extra"]
@@ -0,0 +1,35 @@
+import json
+from pathlib import Path
+
+from hatch_una import util
+
+from una import files, layout
+from una.cache import get_cache_dir
+
+
+def test_manifest_roundtrip(workspace: Path):
+    found = layout.get_layout(workspace)
+    assert set(found.packages) == {"printer", "greeter"}
+    assert layout.read_manifest(workspace) is None
+
+    layout.save_manifest(workspace)
+    assert layout.read_manifest(workspace) == found
+
+
+def test_manifest_stale_after_new_package(workspace: Path):
+    layout.save_manifest(workspace)
+    files.create_package(workspace, "myws", "extra", "libs", "", "", "")
+    assert layout.read_manifest(workspace) is None
+    assert "extra" in layout.get_layout(workspace).packages
+
+
+def test_hatch_reads_manifest(workspace: Path):
+    layout.save_manifest(workspace)
+    data = json.loads((get_cache_dir(workspace) / layout.LAYOUT_FILE).read_text())
+    # make the manifest distinguishable from globbing
+    data["packages"]["printer"] = "elsewhere"
+    (get_cache_dir(workspace) / layout.LAYOUT_FILE).write_text(json.dumps(data))
+
+    found = util._get_layout(workspace)  # pyright:ignore[reportPrivateUsage]
+    assert found.packages["printer"] == (workspace / "elsewhere").resolve()
+    assert found.packages["greeter"] == (workspace / "libs" / "greeter").resolve()
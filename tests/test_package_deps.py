@@ -0,0 +1,26 @@
+from pathlib import Path
+
+import pytest
+
+from una import package_deps
+
+
+def _names(workspace: Path, patterns: list[str] | None = None, all_packages: bool = False):
+    packages = package_deps.get_packages(package_deps.get_package_confs(workspace))
+    selected = package_deps.select_packages(packages, workspace, patterns, all_packages)
+    return [p.name for p in selected]
+
+
+def test_select_default(workspace: Path, monkeypatch: pytest.MonkeyPatch):
+    assert _names(workspace) == ["printer", "greeter"]
+    monkeypatch.chdir(workspace / "libs" / "greeter" / "myws")
+    assert _names(workspace) == ["greeter"]
+    assert _names(workspace, all_packages=True) == ["printer", "greeter"]
+
+
+def test_select_patterns(workspace: Path):
+    assert _names(workspace, ["greeter"]) == ["greeter"]
+    assert _names(workspace, ["apps/*"]) == ["printer"]
+    assert _names(workspace, ["*er", "printer"]) == ["printer", "greeter"]
+    with pytest.raises(ValueError, match="No package matches 'nope'"):
+        _names(workspace, ["nope"])
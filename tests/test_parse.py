@@ -0,0 +1,107 @@
+import ast
+from pathlib import Path
+
+from una import parse
+
+
+def _make_package(path: Path, n_modules: int) -> Path:
+    pkg = path / "pkg" / "ns" / "pkg"
+    pkg.mkdir(parents=True)
+    for i in range(n_modules):
+        content = f"import os\nimport dep_{i % 7}\nfrom ns.lib_{i % 5} import thing_{i}\n"
+        (pkg / f"mod_{i}.py").write_text(content, encoding="utf-8")
+    return path / "pkg"
+
+
+def test_parallel_matches_serial(tmp_path: Path):
+    pkg = _make_package(tmp_path, parse.PARALLEL_MIN_FILES + 10)
+    serial = parse.fetch_all_imports({pkg}, jobs=1)
+    parallel = parse.fetch_all_imports({pkg}, jobs=3)
+    assert serial == parallel
+    assert len(serial["pkg"]) == 1 + 7 + parse.PARALLEL_MIN_FILES + 10
+
+
+_TRICKY_MODULE = '''\
+"""Docstring mentioning import nothing_here."""
+from __future__ import annotations
+
+import os, sys as system
+from typing import TYPE_CHECKING
+from . import relative
+from .sibling import ignored
+
+if TYPE_CHECKING:
+    from ns.typing_only import Thing
+elif os.name == "nt":
+    import winonly
+else:
+    import posixonly
+
+try:
+    import fast_json as json
+except ImportError:
+    import json
+else:
+    from ns.else_branch import x
+finally:
+    import in_finally
+
+
+class Foo:
+    import in_class
+
+    def method(self):
+        from ns.in_method import y
+
+        async def inner():
+            async with ctx() as c:
+                import in_async_with
+            async for _ in c:
+                import in_async_for
+            return lambda: __import__("not_a_statement")
+
+
+def func():
+    for _ in range(3):
+        while True:
+            import in_while
+            break
+    with open("f") as f:
+        import in_with
+    match f:
+        case "a":
+            import in_match
+        case _:
+            from ns import in_match_default
+'''
+
+
+def test_fast_engine_matches_ast(tmp_path: Path):
+    path = tmp_path / "tricky.py"
+    path.write_text(_TRICKY_MODULE, encoding="utf-8")
+    expected = parse._extract_imports(path)  # pyright:ignore[reportPrivateUsage]
+    res = parse._extract_imports_fast(path)  # pyright:ignore[reportPrivateUsage]
+    assert sorted(res) == sorted(expected)
+    names = {i for i, _, _ in res}
+    assert "ns.in_match_default" in names and "in_async_for" in names
+    # only kept for the module graph
+    assert ".relative" in names and ".sibling.ignored" in names
+    assert ".relative" not in parse.fetch_all_imports({tmp_path})[tmp_path.name]
+
+
+def test_import_locations(tmp_path: Path):
+    path = tmp_path / "pkg" / "mod.py"
+    path.parent.mkdir()
+    path.write_text("import os\n\nif True:\n    from ns.lib import a, b\n", encoding="utf-8")
+    expected = [("os", 1, 1), ("ns.lib.a", 4, 5), ("ns.lib.b", 4, 5)]
+    for engine in parse.Engine:
+        res = parse.fetch_import_locations({tmp_path / "pkg"}, engine=engine)
+        assert res == {"pkg": {path: expected}}
+
+
+def test_fast_engine_matches_ast_on_real_code():
+    for root in [Path(parse.__file__).parent, Path(ast.__file__).parent / "importlib"]:
+        for path in root.rglob("*.py"):
+            expected = parse._extract_imports(path)  # pyright:ignore[reportPrivateUsage]
+            res = parse._extract_imports_fast(path)  # pyright:ignore[reportPrivateUsage]
+            assert sorted(res) == sorted(expected), path
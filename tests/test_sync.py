@@ -0,0 +1,74 @@
+from pathlib import Path
+
+import pytest
+
+from una import config, files, package_deps, sync
+from una.types import CheckDiff, Conf
+
+_PYPROJ = """\
+[project]
+name = "app"
+dependencies = ["printer"]  # keep me
+
+[tool.uv.sources]
+printer = { workspace = true }
+"""
+
+
+def test_conf_from_str():
+    conf = Conf.from_str(_PYPROJ)
+    assert conf.project.dependencies == ["printer"]
+    assert conf.tool.uv.sources["printer"].workspace
+    assert conf.tool.uv.workspace.members == ["libs/*", "apps/*"]
+
+
+def test_generate_updated_package():
+    res = sync._generate_updated_package(_PYPROJ, {"greeter"})  # pyright:ignore[reportPrivateUsage]
+    assert res is not None
+    assert 'dependencies = ["printer", "greeter"]  # keep me' in res
+    assert "greeter = { workspace = true }" in res
+    conf = Conf.from_str(res)
+    assert conf.tool.uv.sources["greeter"].workspace
+
+
+def test_generate_updated_package_no_change():
+    assert sync._generate_updated_package(_PYPROJ, set()) is None  # pyright:ignore[reportPrivateUsage]
+
+
+def test_generate_updated_package_malformed():
+    content = _PYPROJ.replace('["printer"]', '"printer"')
+    with pytest.raises(ValueError, match="project.dependencies isn't an array"):
+        sync._generate_updated_package(content, {"greeter"})  # pyright:ignore[reportPrivateUsage]
+    content = _PYPROJ.replace("[tool.uv.sources]\n", "[tool.uv]\nsources = []\n")
+    with pytest.raises(ValueError, match="tool.uv.sources isn't a table"):
+        sync._generate_updated_package(content, {"greeter"})  # pyright:ignore[reportPrivateUsage]
+
+
+def test_sync_packages(workspace: Path):
+    files.create_package(
+        workspace, "myws", "top", "libs", "", '"printer"', "printer = { workspace = true }"
+    )
+    confs = package_deps.get_package_confs(workspace)
+    packages = {p.path.name: p for p in package_deps.get_packages(confs)}
+    top = workspace / "libs" / "top" / "pyproject.toml"
+    printer = workspace / "apps" / "printer" / "pyproject.toml"
+    printer_mtime = printer.stat().st_mtime_ns
+
+    diffs = [
+        CheckDiff(packages["top"], {}, {}, {"greeter"}, set()),
+        # already declared, so nothing to change
+        CheckDiff(packages["printer"], {}, {}, {"greeter"}, set()),
+    ]
+    assert sync.sync_packages(diffs, jobs=2) == [top]
+    assert config.load_conf(top.parent).project.dependencies == ["printer", "greeter"]
+    assert printer.stat().st_mtime_ns == printer_mtime
+    assert sync.sync_packages(diffs) == []
+
+
+def test_generate_updated_package_prune():
+    content = _PYPROJ.replace('["printer"]', '[\n    "printer",\n    "requests>=2",  # http\n]')
+    res = sync._generate_updated_package(content, set(), {"printer", "requests"})  # pyright:ignore[reportPrivateUsage]
+    assert res is not None
+    conf = Conf.from_str(res)
+    assert conf.project.dependencies == []
+    assert conf.tool.uv.sources == {}
@@ -0,0 +1,47 @@
+from pathlib import Path
+
+from una import files
+from una.cache import ImportCache
+from una.watch import Watcher
+
+
+def test_watcher_rechecks_affected_packages(workspace: Path):
+    files.create_package(workspace, "myws", "extra", "libs", "", "", "")
+    watcher = Watcher(workspace, "myws", [], ImportCache(workspace, {}))
+    initial = watcher.check_all()
+    assert {d.package.name for d in initial} == {"printer", "greeter", "extra"}
+    assert not any(d.int_dep_diff for d in initial)
+
+    lib_file = workspace / "libs/greeter/myws/greeter/__init__.py"
+    with lib_file.open("a", encoding="utf-8") as f:
+        f.write("\nfrom myws import extra\n")
+    changed = watcher.update({lib_file})
+    assert [(d.package.name, d.int_dep_diff) for d in changed] == [("printer", {"extra"})]
+
+    # an unrelated change doesn't report anything
+    extra_file = workspace / "libs/extra/myws/extra/__init__.py"
+    extra_file.write_text("import os\n", encoding="utf-8")
+    assert watcher.update({extra_file}) == []
+
+
+def test_watcher_notices_changes_outside_selection(workspace: Path):
+    files.create_package(workspace, "myws", "extra", "libs", "", "", "")
+    watcher = Watcher(workspace, "myws", [], ImportCache(workspace, {}), patterns=["printer"])
+    assert [d.package.name for d in watcher.check_all()] == ["printer"]
+
+    # greeter isn't selected, but printer depends on it
+    lib_file = workspace / "libs/greeter/myws/greeter/__init__.py"
+    with lib_file.open("a", encoding="utf-8") as f:
+        f.write("\nfrom myws import extra\n")
+    changed = watcher.update({lib_file})
+    assert [(d.package.name, d.int_dep_diff) for d in changed] == [("printer", {"extra"})]
+
+
+def test_watcher_reports_unused(workspace: Path):
+    pyproj = workspace / "libs/greeter/pyproject.toml"
+    pyproj.write_text(
+        pyproj.read_text().replace("dependencies = [", 'dependencies = ["typer", ', 1)
+    )
+    watcher = Watcher(workspace, "myws", [], ImportCache(workspace, {}), unused=True)
+    results = {d.package.name: d.unused_deps for d in watcher.check_all()}
+    assert results == {"greeter": {"typer"}, "printer": set()}
@@ -0,0 +1,174 @@
+"""
+Build the wheels of many packages at once.
+
+Before building, the internal dependency closure of every package is written
+to a manifest, and its path passed to the hatch-una hooks with the
+UNA_BUILD_MANIFEST environment variable, so each build doesn't have to
+rediscover the workspace. The format must be kept in sync with `hatch_una.util`.
+
+If hatch-una is installed alongside una, wheels whose inputs haven't changed
+since they were last built are copied from its wheel cache instead. The
+fingerprint of the inputs is worked out here and passed to the hooks with the
+UNA_BUILD_FINGERPRINT environment variable, so that both sides agree on it.
+"""
+
+import importlib
+import os
+import shutil
+import subprocess
+import time
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from graphlib import CycleError, TopologicalSorter
+from pathlib import Path
+from types import ModuleType
+from typing import Any
+
+from una import cache
+from una.types import BuildResult, ConfWrapper, PackageDeps
+
+MANIFEST_ENV = "UNA_BUILD_MANIFEST"
+FINGERPRINT_ENV = "UNA_BUILD_FINGERPRINT"
+MANIFEST_FILE = "build.json"
+MANIFEST_VERSION = 1
+
+# the internal packages (name -> dir) and external requirements a package needs
+Closure = tuple[dict[str, Path], list[str]]
+
+
+def build_all(
+    root: Path,
+    confs: list[ConfWrapper],
+    packages: list[PackageDeps],
+    out_dir: Path,
+    jobs: int,
+    report: Callable[[BuildResult], None] = lambda _: None,
+    use_cache: bool = True,
+) -> list[BuildResult]:
+    """
+    Build a wheel for each of `packages` with `uv build`, up to `jobs` at a time.
+
+    Packages are started as soon as all the internal packages they depend on have
+    been built, and skipped if any of those failed.
+    """
+    manifest = write_manifest(root, confs)
+    env = {**os.environ, MANIFEST_ENV: str(manifest)}
+    by_name = {p.path.name: p for p in packages}
+    versions = {c.path.name: c.conf.project.version for c in confs}
+    sorter = TopologicalSorter(
+        {n: {d.name for d in p.int_deps if d.name in by_name} for n, p in by_name.items()}
+    )
+    try:
+        sorter.prepare()
+    except CycleError as e:
+        cycle: list[str] = e.args[1]
+        raise ValueError(f"Internal dependency cycle: {' -> '.join(cycle)}") from e
+
+    results: dict[str, BuildResult] = {}
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        running: dict[Future[BuildResult], str] = {}
+        while sorter.is_active():
+            for name in sorter.get_ready():
+                package = by_name[name]
+                if any(not results[d.name].ok for d in package.int_deps if d.name in by_name):
+                    results[name] = BuildResult(package, ok=False, skipped=True)
+                    report(results[name])
+                    sorter.done(name)
+                else:
+                    version = versions[name] if use_cache else None
+                    running[pool.submit(_build, package, version, out_dir, env)] = name
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                results[name] = future.result()
+                report(results[name])
+                sorter.done(name)
+    return [results[p.path.name] for p in packages]
+
+
+def _build(
+    package: PackageDeps, version: str | None, out_dir: Path, env: dict[str, str]
+) -> BuildResult:
+    start = time.perf_counter()
+    hatch_cache = _hatch_cache() if version else None
+    if hatch_cache and version:
+        fingerprint: str = hatch_cache.fingerprint(package.path, version)
+        wheel: Path | None = hatch_cache.get_wheel(package.path, fingerprint)
+        if wheel:
+            out_dir.mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(wheel, out_dir / wheel.name)
+            return BuildResult(package, True, time.perf_counter() - start, reused=True)
+        env = {**env, FINGERPRINT_ENV: fingerprint}
+
+    res = subprocess.run(
+        ["uv", "build", "--wheel", "--out-dir", str(out_dir), str(package.path)],
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    seconds = time.perf_counter() - start
+    return BuildResult(package, res.returncode == 0, seconds, res.stdout + res.stderr)
+
+
+def _hatch_cache() -> ModuleType | None:
+    try:
+        # not a dependency of una, so imported dynamically
+        return importlib.import_module("hatch_una.cache")
+    except ImportError:
+        return None
+
+
+def write_manifest(root: Path, confs: list[ConfWrapper]) -> Path:
+    closures = get_closures(confs)
+    data: dict[str, Any] = {
+        "version": MANIFEST_VERSION,
+        "packages": {
+            str(path): {
+                "int_deps": {k: str(v) for k, v in int_deps.items()},
+                "ext_deps": ext_deps,
+            }
+            for path, (int_deps, ext_deps) in closures.items()
+        },
+    }
+    cache.write_json(root, MANIFEST_FILE, data)
+    return cache.get_cache_dir(root) / MANIFEST_FILE
+
+
+def get_closures(confs: list[ConfWrapper]) -> dict[Path, Closure]:
+    """
+    The internal packages (dependencies first) and external requirements that each
+    package needs, transitively, as `hatch_una.util.get_closure` would find them.
+    """
+    by_name = {c.path.name: c for c in confs}
+    closures: dict[Path, Closure] = {}
+
+    def closure(conf: ConfWrapper, stack: tuple[str, ...]) -> Closure:
+        path = conf.path.resolve()
+        if path in closures:
+            return closures[path]
+        name = conf.path.name
+        if name in stack:
+            cycle = [*stack[stack.index(name) :], name]
+            raise ValueError(f"Internal dependency cycle: {' -> '.join(cycle)}")
+        sources = conf.conf.tool.uv.sources
+        all_int: dict[str, Path] = {}
+        own_ext: list[str] = []
+        dep_ext: list[str] = []
+        for d in conf.conf.project.dependencies:
+            if d in sources and sources[d].workspace:
+                if d not in by_name:
+                    raise ValueError(f"Couldn't find package '{d}'")
+                sub_int, sub_ext = closure(by_name[d], (*stack, name))
+                all_int.update(sub_int)
+                all_int[d] = by_name[d].path.resolve()
+                dep_ext.extend(sub_ext)
+            else:
+                own_ext.append(d.replace(" ", ""))
+        closures[path] = (all_int, list(dict.fromkeys([*own_ext, *dep_ext])))
+        return closures[path]
+
+    for c in confs:
+        closure(c, ())
+    return closures
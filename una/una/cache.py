@@ -0,0 +1,229 @@
+"""
+Persistent on-disk cache of the imports found in each Python file.
+
+Entries are keyed by the file's path relative to the workspace root and are
+considered fresh while its (mtime_ns, size) is unchanged. With `use_hash`, a file
+whose mtime changed (eg after a fresh git checkout in CI) is still a hit if the
+content hash matches. The line and column of every import are stored too, for
+`una sync --explain`. The whole cache is dropped when the una or Python version changes,
+and the entries of files that have been deleted or renamed whenever it's saved.
+"""
+
+import hashlib
+import importlib.metadata
+import json
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from una import consts
+from una.types import CheckDiff, ImportLocation, PackageDeps, TreeState
+
+CACHE_FILE = "imports.json"
+RESULTS_FILE = "results.json"
+# bumped when the layout of a cache file changes, so old ones are dropped
+CACHE_FORMAT = 4
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    mtime_ns: int
+    size: int
+    digest: str | None
+    imports: list[ImportLocation]
+
+
+def cache_version() -> str:
+    try:
+        una_version = importlib.metadata.version("una")
+    except importlib.metadata.PackageNotFoundError:
+        una_version = "dev"
+    py_version = ".".join(str(v) for v in sys.version_info[:3])
+    return f"una-{una_version}-py{py_version}-{CACHE_FORMAT}"
+
+
+def get_cache_dir(root: Path) -> Path:
+    return root / consts.CACHE_DIR
+
+
+def _digest(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+
+
+class ImportCache:
+    def __init__(self, root: Path, entries: dict[str, CacheEntry], use_hash: bool = False):
+        self.root = root
+        self.entries = entries
+        self.use_hash = use_hash
+        self.hits = 0
+        self.misses = 0
+        self._dirty = False
+        # keys looked up or stored in this run, whose files are known to exist
+        self._seen: set[str] = set()
+
+    @classmethod
+    def load(cls, root: Path, use_hash: bool = False) -> "ImportCache":
+        data = read_json(root, CACHE_FILE)
+        raw: dict[str, list[Any]] = data.get("entries", {})
+        entries = {
+            k: CacheEntry(mtime_ns, size, digest, [(i, line, col) for i, line, col in imports])
+            for k, (mtime_ns, size, digest, imports) in raw.items()
+        }
+        return cls(root, entries, use_hash)
+
+    def save(self) -> None:
+        # only the files that weren't looked up have to be checked
+        gone = [k for k in self.entries if k not in self._seen and not (self.root / k).exists()]
+        for k in gone:
+            del self.entries[k]
+        if not (self._dirty or gone):
+            return
+        data = {
+            "version": cache_version(),
+            "entries": {
+                k: [e.mtime_ns, e.size, e.digest, e.imports]
+                for k, e in sorted(self.entries.items())
+            },
+        }
+        write_json(self.root, CACHE_FILE, data)
+        self._dirty = False
+
+    def _key(self, path: Path) -> str:
+        try:
+            return path.resolve().relative_to(self.root.resolve()).as_posix()
+        except ValueError:
+            return path.resolve().as_posix()
+
+    def get(self, path: Path) -> list[ImportLocation] | None:
+        key = self._key(path)
+        self._seen.add(key)
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        stat = path.stat()
+        if entry.size == stat.st_size:
+            if entry.mtime_ns == stat.st_mtime_ns:
+                self.hits += 1
+                return entry.imports
+            if self.use_hash and entry.digest and _digest(path) == entry.digest:
+                self.hits += 1
+                self._store(key, stat.st_mtime_ns, stat.st_size, entry.digest, entry.imports)
+                return entry.imports
+        self.misses += 1
+        return None
+
+    def stamp(self, path: Path) -> tuple[int, int, str | None]:
+        """
+        The mtime, size and (with `use_hash`) digest of `path`, to pass to `set`.
+
+        It has to be taken before the file is read, so that if the file is written while
+        it's parsed, the entry is for the old version and the new one is parsed next time.
+        """
+        stat = path.stat()
+        return stat.st_mtime_ns, stat.st_size, _digest(path) if self.use_hash else None
+
+    def set(
+        self, path: Path, imports: list[ImportLocation], stamp: tuple[int, int, str | None]
+    ) -> None:
+        mtime_ns, size, digest = stamp
+        self._store(self._key(path), mtime_ns, size, digest, imports)
+
+    def _store(
+        self, key: str, mtime_ns: int, size: int, digest: str | None, imports: list[ImportLocation]
+    ):
+        self.entries[key] = CacheEntry(mtime_ns, size, digest, imports)
+        self._seen.add(key)
+        self._dirty = True
+
+
+def load_results(
+    root: Path, packages: list[PackageDeps], options: list[str]
+) -> tuple[dict[str, CheckDiff], TreeState | None]:
+    """
+    Load the results of the last `una sync` for the given packages, and the state of
+    the git tree they were checked in.
+
+    Results are only returned if they were created by the same una and Python version
+    with the same check `options` (eg aliases), in a git tree whose state was recorded.
+    """
+    data = read_json(root, RESULTS_FILE)
+    state: dict[str, Any] | None = data.get("state")
+    if data.get("options") != options or state is None:
+        return {}, None
+    results: dict[str, dict[str, Any]] = data.get("results", {})
+    diffs = {p.name: diff_from_json(p, results[p.name]) for p in packages if p.name in results}
+    return diffs, TreeState(state["commit"], state["changed"])
+
+
+def save_results(
+    root: Path, diffs: list[CheckDiff], options: list[str], state: TreeState | None
+) -> None:
+    """
+    Store the results for `diffs`, checked with the git tree in `state`.
+
+    Stored results for other packages are kept if they were checked in the same state.
+    """
+    data = read_json(root, RESULTS_FILE)
+    state_json = {"commit": state.commit, "changed": state.changed} if state else None
+    same = state_json is not None and data.get("state") == state_json
+    results: dict[str, Any] = (
+        data.get("results", {}) if same and data.get("options") == options else {}
+    )
+    results.update({d.package.name: diff_to_json(d) for d in diffs})
+    write_json(
+        root,
+        RESULTS_FILE,
+        {"version": cache_version(), "options": options, "state": state_json, "results": results},
+    )
+
+
+def diff_to_json(diff: CheckDiff) -> dict[str, Any]:
+    return {
+        "int_dep_imports": {k: sorted(v) for k, v in sorted(diff.int_dep_imports.items())},
+        "ext_dep_imports": {k: sorted(v) for k, v in sorted(diff.ext_dep_imports.items())},
+        "int_dep_diff": sorted(diff.int_dep_diff),
+        "ext_dep_diff": sorted(diff.ext_dep_diff),
+        "unused_deps": sorted(diff.unused_deps),
+    }
+
+
+def diff_from_json(package: PackageDeps, data: dict[str, Any]) -> CheckDiff:
+    int_dep_imports: dict[str, list[str]] = data["int_dep_imports"]
+    ext_dep_imports: dict[str, list[str]] = data["ext_dep_imports"]
+    return CheckDiff(
+        package=package,
+        int_dep_imports={k: set(v) for k, v in int_dep_imports.items()},
+        ext_dep_imports={k: set(v) for k, v in ext_dep_imports.items()},
+        int_dep_diff=set(data["int_dep_diff"]),
+        ext_dep_diff=set(data["ext_dep_diff"]),
+        unused_deps=set(data["unused_deps"]),
+    )
+
+
+def read_json(root: Path, name: str) -> dict[str, Any]:
+    """Read a cache file, or return an empty dict if it's missing, corrupt or outdated."""
+    try:
+        with (get_cache_dir(root) / name).open(encoding="utf-8") as f:
+            data: dict[str, Any] = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != cache_version():  # pyright:ignore[reportUnnecessaryIsInstance]
+        return {}
+    return data
+
+
+def write_json(root: Path, name: str, data: dict[str, Any]) -> None:
+    cache_dir = get_cache_dir(root)
+    cache_dir.mkdir(exist_ok=True)
+    gitignore = cache_dir / ".gitignore"
+    if not gitignore.exists():
+        gitignore.write_text("# created by una\n*\n", encoding="utf-8")
+    # write to a temporary file and rename, so an interrupted run can't corrupt the cache
+    tmp = cache_dir / f"{name}.{os.getpid()}.tmp"
+    with tmp.open("w", encoding="utf-8") as f:
+        json.dump(data, f, separators=(",", ":"))
+    tmp.replace(cache_dir / name)
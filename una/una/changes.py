@@ -0,0 +1,110 @@
+import subprocess
+import sys
+from pathlib import Path
+
+from una import consts
+from una.types import CheckDiff, PackageDeps, TreeState
+
+# changes to these files (outside of any package) can affect every package
+_GLOBAL_FILES = {consts.PYPROJ_FILE, "uv.lock"}
+
+
+def changed_files(root: Path, since: str) -> list[Path]:
+    """
+    Files changed since the git ref `since`, including uncommitted and untracked files.
+
+    If `since` is "-", the list of files is read from stdin instead, one per line.
+    """
+    if since == "-":
+        names = [line.strip() for line in sys.stdin]
+    else:
+        diff = _git(root, "diff", "--name-only", since, "--")
+        untracked = _git(root, "ls-files", "--others", "--exclude-standard")
+        names = diff + untracked
+    return [(root / n).resolve() for n in names if n]
+
+
+def tree_state(root: Path) -> TreeState | None:
+    """The commit checked out and the files changed since, or None outside a git repository."""
+    try:
+        commit = _git(root, "rev-parse", "HEAD")[0]
+        files = changed_files(root, commit)
+    except ValueError:
+        return None
+    root = root.resolve()
+    changed = sorted(f.relative_to(root).as_posix() for f in files if f.is_relative_to(root))
+    return TreeState(commit, changed)
+
+
+def changed_since_state(root: Path, state: TreeState) -> list[Path] | None:
+    """
+    Files that may have changed since `state` was taken.
+
+    That is those changed since its commit, and those that had already changed then.
+    Returns None if its commit is gone (eg after a rebase).
+    """
+    try:
+        files = changed_files(root, state.commit)
+    except ValueError:
+        return None
+    return files + [(root / f).resolve() for f in state.changed]
+
+
+def _git(root: Path, *args: str) -> list[str]:
+    try:
+        res = subprocess.run(
+            ["git", *args],
+            cwd=root,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except subprocess.CalledProcessError as e:
+        raise ValueError(f"git {' '.join(args)} failed: {e.stderr.strip()}") from e
+    except OSError as e:
+        raise ValueError(f"git {' '.join(args)} failed: {e}") from e
+    return res.stdout.splitlines()
+
+
+def owning_packages(root: Path, files: list[Path], packages: list[PackageDeps]) -> set[str] | None:
+    """
+    Names of the packages that contain any of `files`.
+
+    Returns None if a file that affects the whole workspace (eg the root pyproject.toml)
+    has changed.
+    """
+    by_dir = {p.path.resolve(): p.name for p in packages}
+    root = root.resolve()
+    owners: set[str] = set()
+    for f in files:
+        if f.parent == root and f.name in _GLOBAL_FILES:
+            return None
+        owner = next((by_dir[d] for d in f.parents if d in by_dir), None)
+        if owner:
+            owners.add(owner)
+    return owners
+
+
+def affected_packages(
+    changed: set[str], packages: list[PackageDeps], previous: dict[str, CheckDiff]
+) -> set[str]:
+    """
+    Packages whose previous result can't be reused.
+
+    That is those that have changed themselves, that have no previous result, or that
+    (according to their previous result) depend directly or transitively on a changed package.
+    """
+    dir_names = {p.name: p.path.name for p in packages}
+    changed_dirs = {dir_names[c] for c in changed if c in dir_names}
+    affected: set[str] = set()
+    for p in packages:
+        prev = previous.get(p.name)
+        if p.name in changed or prev is None:
+            affected.add(p.name)
+            continue
+        used = {d.name for d in p.int_deps}.union(
+            prev.int_dep_imports.keys(), *prev.int_dep_imports.values()
+        )
+        if used & changed_dirs:
+            affected.add(p.name)
+    return affected
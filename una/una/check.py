@@ -1,26 +1,38 @@
 """Code from https://github.com/DavidVujic/python-polylith"""
 
-import difflib
-from pathlib import Path
+from collections import defaultdict
 
-from una import distributions, package_deps, parse, stdlib
+from una import distributions, stdlib, timing
 from una.types import CheckDiff, Imports, PackageDeps
-
-
-def check_package_deps(root: Path, ns: str, package: PackageDeps, alias: list[str]) -> CheckDiff:
-    dep_pkgs = {c for c in package.int_deps}
-    all_paths = [c.path for c in package_deps.get_package_confs(root)]
-    dep_paths = {p for p in all_paths if p.name in {d.name for d in dep_pkgs}}
-
-    all_imports = parse.fetch_all_imports(dep_paths)
-    int_dep_imports = _get_int_dep_imports(all_imports, root, ns)
-    ext_dep_imports = _get_ext_dep_imports(all_imports, ns)
+from una.workspace import WorkspaceGraph
+
+# similarity needed for a fuzzy match between an import and a dependency
+_CUTOFF = 0.6
+
+
+@timing.timed("diff")
+def check_package_deps(
+    graph: WorkspaceGraph,
+    package: PackageDeps,
+    alias: list[str],
+    fuzzy: bool = False,
+    unused: bool = False,
+) -> CheckDiff:
+    dep_names = {d.name for d in package.int_deps}
+    dep_names = {n for n in dep_names if n in graph.paths}
+
+    all_imports = {n: graph.imports(n) for n in dep_names}
+    int_dep_imports = graph.int_dep_imports(dep_names)
+    ext_dep_imports = _get_ext_dep_imports(all_imports, graph.ns)
     ext_dep_imports = {k: v for k, v in ext_dep_imports.items() if k == package.name}
 
-    external_deps = distributions.collect_deps(package.ext_deps, alias)
+    # only persist the distribution index if caching is enabled
+    index = distributions.get_index(graph.root if graph.cache else None)
+    external_deps = distributions.collect_deps(package.ext_deps, alias, index)
     int_deps = {c.name for c in package.int_deps}
     int_dep_diff: set[str] = set().union(*int_dep_imports.values()).difference(int_deps)
-    ext_dep_diff = _ext_dep_diff(ext_dep_imports, external_deps)
+    ext_dep_diff = _ext_dep_diff(ext_dep_imports, external_deps, fuzzy)
+    unused_deps: set[str] = _unused_deps(graph, package, alias, index, fuzzy) if unused else set()
 
     return CheckDiff(
         package=package,
@@ -28,47 +40,54 @@ def check_package_deps(root: Path, ns: str, package: PackageDeps, alias: list[st
         ext_dep_imports=ext_dep_imports,
         int_dep_diff=int_dep_diff,
         ext_dep_diff=ext_dep_diff,
+        unused_deps=unused_deps,
     )
 
 
-def _extract_int_deps(paths: set[Path], ns: str) -> Imports:
-    all_imports = parse.fetch_all_imports(paths)
-    return _extract_int_dep_imports(all_imports, ns)
-
-
-def _with_unknown_deps(root: Path, ns: str, int_dep_imports: Imports) -> Imports:
-    keys = set(int_dep_imports.keys())
-    values: set[str] = set().union(*int_dep_imports.values())
-    unknowns = values.difference(keys)
-    if not unknowns:
-        return int_dep_imports
-    all_paths = [c.path for c in package_deps.get_package_confs(root)]
-    paths = {p for p in all_paths if p.name in unknowns}
-    extracted = _extract_int_deps(paths, ns)
-    if not extracted:
-        return int_dep_imports
-    collected = {**int_dep_imports, **extracted}
-    return _with_unknown_deps(root, ns, collected)
-
-
-def _only_int_dep_imports(imports: set[str], ns: str) -> set[str]:
-    return {i for i in imports if i.startswith(ns)}
-
-
-def _only_int_dep_name(int_dep_imports: set[str]) -> set[str]:
-    res = [i.split(".") for i in int_dep_imports]
-    return {i[1] for i in res if len(i) > 1}
-
-
-def _extract_int_dep_imports(all_imports: Imports, ns: str) -> Imports:
-    only_int = {k: _only_int_dep_imports(v, ns) for k, v in all_imports.items()}
-    return {k: _only_int_dep_name(v) for k, v in only_int.items() if v}
-
-
-def _get_int_dep_imports(all_imports: Imports, root: Path, ns: str) -> Imports:
-    extracted = _extract_int_dep_imports(all_imports, ns)
-    res = _with_unknown_deps(root, ns, extracted)
-    return res
+def _unused_deps(
+    graph: WorkspaceGraph,
+    package: PackageDeps,
+    alias: list[str],
+    index: distributions.DistIndex,
+    fuzzy: bool,
+) -> set[str]:
+    """
+    Declared dependencies that nothing in the package imports.
+
+    Internal packages are also needed if an internal package that is imported
+    (directly or not) imports them, as then they have to be declared too.
+    External ones are matched against every name the distribution provides,
+    and the names of its own requirements, so that eg a package only imported
+    through a plugin of it isn't reported. Those that can't be resolved to any
+    import name (not installed, eg only needed on another platform, and without
+    an alias) are never reported: pruning them could remove a dependency in use.
+    """
+    name = package.path.name
+    if name not in graph.paths:
+        return set()
+    imported = graph.int_deps(name) - {name}
+    needed = imported.union(*graph.int_dep_imports(imported).values())
+    unused = {d.name for d in package.int_deps if d.name not in needed}
+
+    top_level = _get_ext_dep_imports({name: graph.imports(name)}, graph.ns).get(name, set())
+    imports_norm = {distributions.normalize(i) for i in top_level}
+    by_ngram: dict[str, set[str]] = defaultdict(set)
+    if fuzzy:
+        for i in imports_norm:
+            for g in _ngrams(i):
+                by_ngram[g].add(i)
+    for dep in package.ext_deps:
+        if not distributions.import_names(dep, alias, index):
+            continue
+        provided = {
+            distributions.normalize(n) for n in distributions.collect_deps([dep], alias, index)
+        }
+        if provided & imports_norm:
+            continue
+        if fuzzy and any(_fuzzy_match(p, by_ngram) for p in provided):
+            continue
+        unused.add(dep.name)
+    return unused
 
 
 def _extract_ns_from_imports(imports: set[str]) -> set[str]:
@@ -82,12 +101,35 @@ def _get_ext_dep_imports(all_imports: Imports, ns: str) -> Imports:
     return {k: v for k, v in with_third_party.items() if v}
 
 
-def _ext_dep_diff(imports: Imports, deps: set[str]) -> set[str]:
-    deps_imports: set[str] = set().union(*imports.values())
-    unknown_imports = deps_imports.difference(deps)
-    cutoff = 0.6
+def _ngrams(name: str, n: int = 3) -> set[str]:
+    return {name[i : i + n] for i in range(max(1, len(name) - n + 1))}
+
 
-    unknowns = {str.lower(u) for u in unknown_imports}
-    deps_norm = {str.lower(d).replace("-", "_") for d in deps}
-    filtered = {u for u in unknowns if not difflib.get_close_matches(u, deps_norm, cutoff=cutoff)}
-    return filtered
+def _ext_dep_diff(imports: Imports, deps: set[str], fuzzy: bool = False) -> set[str]:
+    """
+    Find imports that don't match any of `deps`.
+
+    Imports and deps are first matched exactly after normalizing their names.
+    With `fuzzy`, any remaining imports are compared with difflib, but only against
+    the deps that share at least one trigram with them.
+    """
+    deps_imports: set[str] = set().union(*imports.values())
+    deps_norm = {distributions.normalize(d) for d in deps}
+    unknowns = {str.lower(u) for u in deps_imports if distributions.normalize(u) not in deps_norm}
+    if fuzzy and unknowns:
+        by_ngram: dict[str, set[str]] = defaultdict(set)
+        for d in deps_norm:
+            for g in _ngrams(d):
+                by_ngram[g].add(d)
+        unknowns = {u for u in unknowns if not _fuzzy_match(distributions.normalize(u), by_ngram)}
+    return unknowns
+
+
+def _fuzzy_match(name: str, by_ngram: dict[str, set[str]]) -> bool:
+    # only needed with --fuzzy, so not imported up front
+    import difflib
+
+    candidates: set[str] = set()
+    for g in _ngrams(name):
+        candidates.update(by_ngram.get(g, ()))
+    return bool(difflib.get_close_matches(name, candidates, cutoff=_CUTOFF))
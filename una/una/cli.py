@@ -1,12 +1,20 @@
+import json
+import os
+from enum import StrEnum
 from pathlib import Path
-from typing import Annotated
+from typing import TYPE_CHECKING, Annotated, Any
 
 from rich.console import Console
 from rich.theme import Theme
-from typer import Argument, Exit, Option, Typer
+from typer import Argument, Context, Exit, Option, Typer
 
-from una import check, config, files, package_deps, sync
-from una.types import CheckDiff
+from una import parse, timing
+
+if TYPE_CHECKING:
+    from una.types import BuildResult, CheckDiff, ImportUsage, PackageDeps
+
+# Everything else is imported in the commands that need it,
+# so that eg `una --help` doesn't have to load tomlkit or the checking code.
 
 app = Typer(name="una", no_args_is_help=True, add_completion=False)
 create = Typer(no_args_is_help=True)
@@ -17,11 +25,50 @@ app.add_typer(
 )
 
 
+class OutputFormat(StrEnum):
+    TEXT = "text"
+    # a single JSON array, streamed one package at a time
+    JSON = "json"
+    # one JSON object per line
+    NDJSON = "ndjson"
+
+
+class GraphFormat(StrEnum):
+    # a summary of the metrics
+    TEXT = "text"
+    DOT = "dot"
+    JSON = "json"
+    GRAPHML = "graphml"
+
+
 def rich_console() -> Console:
     theme = Theme({"pkg": "#8A2BE2", "dep": "#32CD32"})
     return Console(theme=theme)
 
 
+@app.callback()
+def main(
+    ctx: Context,
+    profile: Annotated[
+        bool, Option(help="Print the time spent in each phase, and cache statistics")
+    ] = False,
+    profile_output: Annotated[
+        Path | None,
+        Option(help="Write a Chrome trace (also readable by speedscope) to this file"),
+    ] = None,
+):
+    if not (profile or profile_output):
+        return
+    from una import profiling
+
+    if profile_output:
+        timing.start_trace()
+    if profile:
+        ctx.call_on_close(lambda: profiling.print_summary(Console(stderr=True)))
+    if profile_output:
+        ctx.call_on_close(lambda: profiling.write_trace(profile_output))
+
+
 @app.command("sync")
 def sync_command(
     check_only: Annotated[bool, Option(help="Only check, make no changes")] = False,
@@ -29,40 +76,398 @@ def sync_command(
     alias: Annotated[
         str, Option(help="alias for third-party libraries, map install to import name")
     ] = "",
+    cache: Annotated[bool, Option(help="Cache parsed imports in .una_cache")] = True,
+    cache_hash: Annotated[
+        bool, Option(help="Also match cached files by content hash (useful in CI)")
+    ] = False,
+    jobs: Annotated[int, Option(help="Number of processes used to parse files")] = (
+        os.cpu_count() or 1
+    ),
+    parser: Annotated[
+        parse.Engine, Option(help="Import scanner: walk the full AST, or only statements")
+    ] = parse.Engine.AST,
+    all_packages: Annotated[
+        bool, Option("--all", help="Check every package, wherever una is run from")
+    ] = False,
+    package: Annotated[
+        list[str] | None,
+        Option(
+            "--package",
+            "-p",
+            help="Only check packages matching this name, directory or glob (repeatable). "
+            "By default the package containing the current directory, or all of them",
+            show_default=False,
+        ),
+    ] = None,
+    changed_since: Annotated[
+        str,
+        Option(
+            help="Only re-check packages affected by files changed since this git ref "
+            "(or '-' to read changed files from stdin), reusing the last results for the rest"
+        ),
+    ] = "",
+    fuzzy: Annotated[
+        bool, Option(help="Also accept imports that are similar to a dependency's name")
+    ] = False,
+    output_format: Annotated[
+        OutputFormat,
+        Option(
+            "--format",
+            help="Output format. json and ndjson output one record per package with timings",
+        ),
+    ] = OutputFormat.TEXT,
+    watch: Annotated[
+        bool,
+        Option(help="Keep running and re-check packages as files change (implies --check-only)"),
+    ] = False,
+    explain: Annotated[
+        bool, Option(help="Show the file, line and column of each import of a missing dependency")
+    ] = False,
+    check_unused: Annotated[
+        bool, Option(help="Also report declared dependencies that are never imported")
+    ] = False,
+    prune: Annotated[
+        bool, Option(help="Remove declared dependencies that are never imported")
+    ] = False,
 ):
     """Update packages with missing dependencies."""
+    from una import changes, check, config, layout, package_deps, sync
+    from una.cache import ImportCache, diff_to_json, load_results, save_results
+    from una.explain import explain_diff
+    from una.watch import Watcher
+    from una.workspace import WorkspaceGraph
+
+    before = timing.snapshot()
     console = rich_console()
+    machine = output_format != OutputFormat.TEXT
+    quiet = quiet or machine
     root = config.get_workspace_root()
     ns = config.get_ns(root)
     alias_list = alias.split(",") if alias else []
+    # results stored for --changed-since are only valid for the same options
+    unused = check_unused or prune
+    options = [*alias_list, f"fuzzy={fuzzy}", f"unused={unused}"]
+    import_cache = ImportCache.load(root, use_hash=cache_hash) if cache else None
+
+    if watch:
+        watch_cache = import_cache or ImportCache(root, {})
+        watcher = Watcher(
+            root, ns, alias_list, watch_cache, jobs, parser, fuzzy, package, all_packages, unused
+        )
+        console.print("Watching for changes, press Ctrl+C to stop")
+        try:
+            watcher.watch(lambda diffs: _print_diffs(console, diffs, show_ok=True))
+        except KeyboardInterrupt:
+            if import_cache:
+                import_cache.save()
+            raise Exit() from None
+
+    graph = WorkspaceGraph.build(root, ns, import_cache, jobs, parser)
+    every_package = package_deps.get_packages(graph.confs)
+    packages = _select(console, every_package, root, package, all_packages)
 
-    packages = package_deps.get_packages(root)
+    previous, saved = load_results(root, packages, options) if changed_since else ({}, None)
+    if previous and saved:
+        files = changes.changed_files(root, changed_since)
+        # the results may be from before REF, so anything changed since then counts too
+        since_saved = changes.changed_since_state(root, saved)
+        # a changed package that isn't selected can still affect those that are
+        owners = (
+            changes.owning_packages(root, files + since_saved, every_package)
+            if since_saved is not None
+            else None
+        )
+        if owners is None:
+            previous = {}
+        else:
+            affected = changes.affected_packages(owners, every_package, previous)
+            previous = {k: v for k, v in previous.items() if k not in affected}
+
+    to_check = [p for p in packages if p.name not in previous]
+    graph.prefetch({d.name for p in to_check for d in p.int_deps})
     diffs: list[CheckDiff] = []
-    for p in packages:
-        d = check.check_package_deps(root, ns, p, alias_list)
+    # package name -> missing dependency -> where it's imported
+    explained: dict[str, dict[str, list[ImportUsage]]] = {}
+    if output_format == OutputFormat.JSON:
+        print("[", flush=True)
+    for i, p in enumerate(packages):
+        d = previous.get(p.name) or check.check_package_deps(graph, p, alias_list, fuzzy, unused)
         diffs.append(d)
+        if explain and (d.int_dep_diff or d.ext_dep_diff):
+            explained[p.name] = explain_diff(graph, d)
+        if machine:
+            # timings include everything since the previous record, eg loading confs
+            record = {
+                "package": p.name,
+                "path": p.path.as_posix(),
+                "reused": p.name in previous,
+                **diff_to_json(d),
+                **(
+                    {"explain": _explain_to_json(root, explained.get(p.name, {}))}
+                    if explain
+                    else {}
+                ),
+                "timings": timing.since(before),
+            }
+            sep = "," if output_format == OutputFormat.JSON and i < len(packages) - 1 else ""
+            print(json.dumps(record) + sep, flush=True)
+            before = timing.snapshot()
+    if output_format == OutputFormat.JSON:
+        print("]", flush=True)
+
+    if import_cache:
+        import_cache.save()
+        layout.save_manifest(root)
+        # packages that are about to be modified will need to be checked again
+        kept = [d for d in diffs if not (d.int_dep_diff or (prune and d.unused_deps))]
+        to_save = diffs if check_only else kept
+        save_results(root, to_save, options, changes.tree_state(root))
 
     if check_only:
-        for d in diffs:
-            if d.ext_dep_diff:
-                missing = ", ".join(sorted(d.ext_dep_diff))
-                console.print(f"[pkg]{d.package.name}[/] can't find external: [dep]{missing}[/]")
-            if d.int_dep_diff:
-                missing = ", ".join(sorted(d.int_dep_diff))
-                console.print(f"[pkg]{d.package.name}[/] can't find internal: [dep]{missing}[/]")
-
-        if any(d.int_dep_diff or d.ext_dep_diff for d in diffs):
+        if not machine:
+            _print_diffs(console, diffs, explained=explained, root=root)
+        if any(d.int_dep_diff or d.ext_dep_diff or d.unused_deps for d in diffs):
             raise Exit(code=1)
         raise Exit()
 
+    try:
+        written = sync.sync_packages(diffs, jobs, prune)
+    except ValueError as e:
+        console.print(str(e))
+        raise Exit(code=1) from None
+    if quiet:
+        return
     for d in diffs:
-        sync.sync_package(d)
-        if not quiet:
-            for c in d.int_dep_diff:
-                console.print(f"[pkg]{d.package.name}[/] adding dep [dep]{c}[/]")
+        for c in sorted(d.int_dep_diff):
+            console.print(f"[pkg]{d.package.name}[/] adding dep [dep]{c}[/]")
+            _print_usages(console, root, explained.get(d.package.name, {}).get(c, []))
+        for c in sorted(d.unused_deps):
+            action = "removing unused dep" if prune else "unused dep"
+            console.print(f"[pkg]{d.package.name}[/] {action} [dep]{c}[/]")
+    if written:
+        console.print(f"Updated {len(written)} file(s):")
+        for path in written:
+            console.print(f"  {path.relative_to(root)}")
+    console.print("All good!")
+
+
+@app.command("build")
+def build_command(
+    names: Annotated[
+        list[str] | None,
+        Argument(help="Packages to build (names, directories or globs)", show_default=False),
+    ] = None,
+    all_packages: Annotated[
+        bool, Option("--all", help="Build every package in the workspace")
+    ] = False,
+    out_dir: Annotated[Path, Option(help="Where to put the wheels")] = Path("dist"),
+    jobs: Annotated[int, Option(help="Number of wheels to build at once")] = os.cpu_count() or 1,
+    cache: Annotated[
+        bool, Option(help="Reuse wheels whose inputs haven't changed since they were built")
+    ] = True,
+):
+    """Build wheels for many packages at once, in dependency order."""
+    from una import build, config, package_deps
+
+    console = rich_console()
+    root = config.get_workspace_root()
+    confs = package_deps.get_package_confs(root)
+    if not (all_packages or names):
+        console.print("Pass package names or --all")
+        raise Exit(code=1)
+    packages = _select(console, package_deps.get_packages(confs), root, names, all_packages)
+
+    def report(r: "BuildResult") -> None:
+        if r.skipped:
+            console.print(f"[pkg]{r.package.name}[/] skipped, as a dependency failed")
+        elif r.reused:
+            console.print(f"[pkg]{r.package.name}[/] unchanged, reused cached wheel")
+        elif r.ok:
+            console.print(f"[pkg]{r.package.name}[/] built in {r.seconds:.1f}s")
+        else:
+            console.print(f"[pkg]{r.package.name}[/] failed:\n{r.output}")
+
+    results = build.build_all(
+        root, confs, packages, out_dir.resolve(), jobs, report, use_cache=cache
+    )
+    if not all(r.ok for r in results):
+        raise Exit(code=1)
+    console.print(f"Built {len(results)} wheels into {out_dir}")
 
-    if not quiet:
-        console.print("All good!")
+
+@app.command("graph")
+def graph_command(
+    output_format: Annotated[
+        GraphFormat,
+        Option("--format", help="text prints a summary of the metrics, the others the graph"),
+    ] = GraphFormat.TEXT,
+    output: Annotated[
+        Path | None, Option(help="Write to this file instead of stdout", show_default=False)
+    ] = None,
+    top: Annotated[int, Option(help="Number of modules to show for each metric")] = 10,
+    cache: Annotated[bool, Option(help="Cache parsed imports in .una_cache")] = True,
+    jobs: Annotated[int, Option(help="Number of processes used to parse files")] = (
+        os.cpu_count() or 1
+    ),
+    parser: Annotated[
+        parse.Engine, Option(help="Import scanner: walk the full AST, or only statements")
+    ] = parse.Engine.AST,
+):
+    """Show or export the imports between the modules of all packages."""
+    from una import config, graph
+    from una.cache import ImportCache
+    from una.workspace import WorkspaceGraph
+
+    root = config.get_workspace_root()
+    import_cache = ImportCache.load(root) if cache else None
+    ws = WorkspaceGraph.build(root, config.get_ns(root), import_cache, jobs, parser)
+    modules = graph.build_module_graph(ws)
+    metrics = graph.get_metrics(modules)
+    if import_cache:
+        import_cache.save()
+
+    exporters = {
+        GraphFormat.DOT: graph.to_dot,
+        GraphFormat.JSON: graph.to_json,
+        GraphFormat.GRAPHML: graph.to_graphml,
+    }
+    if output_format == GraphFormat.TEXT:
+        if output:
+            with output.open("w", encoding="utf-8") as f:
+                graph.print_summary(Console(file=f), modules, metrics, top)
+        else:
+            graph.print_summary(rich_console(), modules, metrics, top)
+    elif output:
+        output.write_text(exporters[output_format](modules, metrics) + "\n", encoding="utf-8")
+    else:
+        print(exporters[output_format](modules, metrics))
+
+
+@app.command("profile-imports")
+def profile_imports_command(
+    names: Annotated[list[str], Argument(help="Packages to profile (names, directories or globs)")],
+    module: Annotated[
+        list[str] | None,
+        Option(
+            "--module",
+            "-m",
+            help="Module to import (repeatable). By default the package's own module",
+            show_default=False,
+        ),
+    ] = None,
+    python: Annotated[
+        str | None,
+        Option(
+            help="Interpreter to import with. By default the workspace's .venv",
+            show_default=False,
+        ),
+    ] = None,
+    runs: Annotated[int, Option(help="Import this many times and keep the fastest")] = 3,
+    top: Annotated[int, Option(help="Number of rows to show")] = 20,
+):
+    """Show how long importing a package takes, per internal package and distribution."""
+    from rich.table import Table
+
+    from una import config, importtime, package_deps
+
+    console = rich_console()
+    root = config.get_workspace_root()
+    ns = config.get_ns(root)
+    confs = package_deps.get_package_confs(root)
+    packages = _select(console, package_deps.get_packages(confs), root, names, False)
+    paths = [c.path for c in confs]
+    python = python or importtime.default_python(root)
+
+    for p in packages:
+        modules = module or [f"{ns}.{p.path.name}"]
+        try:
+            measured = [importtime.measure(python, modules, paths, root) for _ in range(runs)]
+        except RuntimeError as e:
+            console.print(f"[pkg]{p.name}[/] failed to import:\n{e}", highlight=False)
+            raise Exit(code=1) from None
+        times = min(measured, key=lambda ts: sum(t.self_us for t in ts))
+        costs = importtime.attribute(times, ns, root)
+        total = sum(c.self_us for c in costs) or 1
+
+        table = Table(
+            title=f"{p.name}: {total / 1000:.1f}ms to import {', '.join(modules)}",
+            title_justify="left",
+        )
+        table.add_column("package")
+        table.add_column("kind")
+        table.add_column("self ms", justify="right")
+        table.add_column("cumulative ms", justify="right")
+        table.add_column("%", justify="right")
+        table.add_column("modules", justify="right")
+        for c in costs[:top]:
+            table.add_row(
+                c.owner,
+                c.kind,
+                f"{c.self_us / 1000:.1f}",
+                f"{c.cumulative_us / 1000:.1f}",
+                f"{100 * c.self_us / total:.1f}",
+                str(c.modules),
+            )
+        console.print(table)
+
+
+def _select(
+    console: Console,
+    packages: list["PackageDeps"],
+    root: Path,
+    patterns: list[str] | None,
+    all_packages: bool,
+) -> list["PackageDeps"]:
+    from una import package_deps
+
+    try:
+        return package_deps.select_packages(packages, root, patterns, all_packages)
+    except ValueError as e:
+        console.print(str(e))
+        raise Exit(code=1) from None
+
+
+def _print_diffs(
+    console: Console,
+    diffs: list["CheckDiff"],
+    show_ok: bool = False,
+    explained: dict[str, dict[str, list["ImportUsage"]]] | None = None,
+    root: Path | None = None,
+) -> None:
+    for d in diffs:
+        usages = (explained or {}).get(d.package.name, {})
+        if d.ext_dep_diff:
+            missing = ", ".join(sorted(d.ext_dep_diff))
+            console.print(f"[pkg]{d.package.name}[/] can't find external: [dep]{missing}[/]")
+            for dep in sorted(d.ext_dep_diff):
+                _print_usages(console, root, usages.get(dep, []))
+        if d.int_dep_diff:
+            missing = ", ".join(sorted(d.int_dep_diff))
+            console.print(f"[pkg]{d.package.name}[/] can't find internal: [dep]{missing}[/]")
+            for dep in sorted(d.int_dep_diff):
+                _print_usages(console, root, usages.get(dep, []))
+        if d.unused_deps:
+            unused = ", ".join(sorted(d.unused_deps))
+            console.print(f"[pkg]{d.package.name}[/] doesn't import: [dep]{unused}[/]")
+        if show_ok and not (d.ext_dep_diff or d.int_dep_diff or d.unused_deps):
+            console.print(f"[pkg]{d.package.name}[/] ok")
+
+
+def _print_usages(console: Console, root: Path | None, usages: list["ImportUsage"]) -> None:
+    for u in usages:
+        console.print(f"  {_location(root, u)} [dep]{u.name}[/]", highlight=False)
+
+
+def _explain_to_json(root: Path, explained: dict[str, list["ImportUsage"]]) -> dict[str, Any]:
+    return {
+        dep: [{"location": _location(root, u), "import": u.name} for u in usages]
+        for dep, usages in explained.items()
+    }
+
+
+def _location(root: Path | None, usage: "ImportUsage") -> str:
+    path = usage.path.relative_to(root) if root and usage.path.is_relative_to(root) else usage.path
+    return f"{path.as_posix()}:{usage.line}:{usage.col}"
 
 
 @create.command("package")
@@ -71,6 +476,8 @@ def create_package_command(
     path: Annotated[str, Argument(help="Where to place the package.")],
 ):
     """Creates an Una package."""
+    from una import config, files
+
     console = rich_console()
     root = config.get_workspace_root()
     ns = config.get_ns(root)
@@ -82,6 +489,8 @@ def create_package_command(
 @create.command("workspace")
 def create_workspace_command():
     """Creates an Una workspace in the current directory."""
+    from una import files
+
     console = rich_console()
     path = Path.cwd()
     files.create_workspace(path)
@@ -1,7 +1,7 @@
 from functools import lru_cache
 from pathlib import Path
 
-from una import consts
+from una import consts, timing
 from una.types import Conf
 
 
@@ -10,15 +10,17 @@ def load_conf_from_str(s: str) -> Conf:
 
 
 @lru_cache
-def _load_conf(path: Path) -> Conf:
+def _load_conf(path: Path, mtime_ns: int) -> Conf:
     # made this private as pyright doesn't seem to like the cache decorator
+    # mtime_ns is only there so that edited files are loaded again
     with path.open(encoding="utf-8", errors="ignore") as f:
         return load_conf_from_str(f.read())
 
 
+@timing.timed("conf")
 def load_conf(path: Path) -> Conf:
     fullpath = (path / consts.PYPROJ_FILE).resolve()
-    return _load_conf(fullpath)
+    return _load_conf(fullpath, fullpath.stat().st_mtime_ns)
 
 
 def get_ns(path: Path) -> str:
@@ -33,12 +35,17 @@ def get_members(path: Path) -> list[str]:
 
 
 def get_workspace_root() -> Path:
-    root = _find_upwards(Path.cwd())
+    root = _find_root(Path.cwd())
     if not root:
         raise ValueError("Didn't find the workspace root. Expected to find a .git directory.")
     return root
 
 
+@lru_cache
+def _find_root(cwd: Path) -> Path | None:
+    return _find_upwards(cwd)
+
+
 def _find_upwards(cwd: Path) -> Path | None:
     if cwd == Path(cwd.root) or cwd == cwd.parent:
         return None
@@ -1,3 +1,4 @@
 KEEP_FILE = ".keep"
 ROOT_FILE = ".git"
 PYPROJ_FILE = "pyproject.toml"
+CACHE_DIR = ".una_cache"
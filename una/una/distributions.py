@@ -1,17 +1,44 @@
 """Code from https://github.com/DavidVujic/python-polylith"""
 
+import hashlib
 import importlib.metadata
+import os
 import re
+import sys
+from dataclasses import dataclass
 from functools import lru_cache, reduce
 from importlib.metadata import Distribution
-from typing import cast
+from pathlib import Path
 
+from una import timing
+from una.cache import cache_version, read_json, write_json
 from una.types import ExtDep
 
 SUB_DEP_SEPARATORS = r"[\s!=;><\^~]"
+DISTS_FILE = "dists.json"
 
 
-def collect_deps(deps: list[ExtDep], library_alias: list[str]) -> set[str]:
+@dataclass(frozen=True)
+class DistIndex:
+    """
+    Everything una needs to know about the installed distributions.
+
+    All keys are distribution names, normalized with `normalize`,
+    so looking up a distribution is a single dict lookup however it's spelled.
+    """
+
+    # top-level packages, from top_level.txt
+    packages: dict[str, list[str]]
+    # names of the distribution's requirements
+    sub_packages: dict[str, list[str]]
+    # top-level import names provided, from importlib.metadata.packages_distributions
+    provides: dict[str, list[str]]
+
+
+@timing.timed("dists")
+def collect_deps(
+    deps: list[ExtDep], library_alias: list[str], index: DistIndex | None = None
+) -> set[str]:
     """
     Collect known aliases (packages) for third-party libraries.
 
@@ -19,19 +46,105 @@ def collect_deps(deps: list[ExtDep], library_alias: list[str]) -> set[str]:
     collect sub-dependencies and distribution top-namespace for each library,
     and append to the result.
     """
+    index = index or get_index()
     third_party_libs = _extract_library_names(deps)
-    dists = _get_distributions()
-    dist_packages = _distributions_packages(dists)
+    keys = {normalize(n) for n in third_party_libs}
     custom_aliases = _parse_alias(library_alias)
-    sub_deps = _distributions_sub_packages(dists)
-    a = _pick_alias(dist_packages, third_party_libs)
-    b = _pick_alias(custom_aliases, third_party_libs)
-    c = _pick_alias(_KNOWN_ALIASES, third_party_libs)
-    d = _pick_alias(sub_deps, third_party_libs)
-    e = _get_packages_distributions(third_party_libs)
+    a = _pick_alias(index.packages, keys)
+    b = _pick_alias(custom_aliases, keys)
+    c = _pick_alias(_KNOWN_ALIASES, keys)
+    d = _pick_alias(index.sub_packages, keys)
+    e = _pick_alias(index.provides, keys).difference(third_party_libs)
     return third_party_libs.union(a, b, c, d, e)
 
 
+def import_names(dep: ExtDep, library_alias: list[str], index: DistIndex | None = None) -> set[str]:
+    """
+    The top-level names the distribution of `dep` can be imported as.
+
+    Empty when that can't be told, ie it isn't installed and has no alias.
+    """
+    index = index or get_index()
+    keys = {normalize(n) for n in _extract_library_names([dep])}
+    aliases = [index.packages, index.provides, _parse_alias(library_alias), _KNOWN_ALIASES]
+    return {name for a in aliases for name in _pick_alias(a, keys)}
+
+
+def normalize(name: str) -> str:
+    """Normalize a distribution or import name as in PEP 503."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+@lru_cache
+@timing.timed("dists")
+def get_index(root: Path | None = None) -> DistIndex:
+    """
+    Build the index of installed distributions, once per process.
+
+    If `root` is given, the index is also stored in its una cache directory,
+    and reused for as long as the installed distributions don't change.
+    """
+    if root is None:
+        return _build_index()
+    key = _site_packages_state()
+    data = read_json(root, DISTS_FILE)
+    if data.get("key") == key:
+        return DistIndex(data["packages"], data["sub_packages"], data["provides"])
+    index = _build_index()
+    write_json(
+        root,
+        DISTS_FILE,
+        {
+            "version": cache_version(),
+            "key": key,
+            "packages": index.packages,
+            "sub_packages": index.sub_packages,
+            "provides": index.provides,
+        },
+    )
+    return index
+
+
+def _build_index() -> DistIndex:
+    dists = _get_distributions()
+    provides: dict[str, list[str]] = {}
+    for import_name, dist_names in importlib.metadata.packages_distributions().items():
+        for name in dist_names:
+            provides.setdefault(name, []).append(import_name)
+    return DistIndex(
+        packages=_by_normalized_name(_distributions_packages(dists)),
+        sub_packages=_by_normalized_name(_distributions_sub_packages(dists)),
+        provides=_by_normalized_name(provides),
+    )
+
+
+def _by_normalized_name(index: dict[str, list[str]]) -> dict[str, list[str]]:
+    res: dict[str, list[str]] = {}
+    for k, v in index.items():
+        res.setdefault(normalize(k), []).extend(v)
+    return {k: sorted(set(v)) for k, v in res.items()}
+
+
+def _site_packages_state() -> str:
+    """
+    Fingerprint the installed distributions.
+
+    Installing, removing or upgrading a distribution adds, removes or rewrites
+    its .dist-info directory, so their names and mtimes are enough.
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for entry in sys.path:
+        try:
+            with os.scandir(entry or ".") as it:
+                infos = sorted(e.name for e in it if e.name.endswith((".dist-info", ".egg-info")))
+        except OSError:
+            continue
+        for name in infos:
+            mtime = os.stat(os.path.join(entry or ".", name)).st_mtime_ns
+            h.update(f"{entry}/{name}:{mtime}\n".encode())
+    return h.hexdigest()
+
+
 def _extract_extras(name: str) -> set[str]:
     chars = ["[", "]"]
     replacement = ","
@@ -54,15 +167,11 @@ def _parse_sub_package_name(dependency: str) -> str:
 
 def _dist_subpackages(dist: Distribution) -> dict[str, list[str]]:
     name = dist.metadata["name"]
-    dependencies = importlib.metadata.requires(name) or []
-    parsed_package_names = list({_parse_sub_package_name(d) for d in dependencies})
+    dependencies = dist.requires or []
+    parsed_package_names = sorted({_parse_sub_package_name(d) for d in dependencies})
     return {name: parsed_package_names} if dependencies else {}
 
 
-def _map_sub_packages(acc: dict[str, list[str]], dist: Distribution) -> dict[str, list[str]]:
-    return {**acc, **_dist_subpackages(dist)}
-
-
 def _parsed_top_level_namespace(namespaces: list[str]) -> list[str]:
     return [str.replace(ns, "/", ".") for ns in namespaces]
 
@@ -79,19 +188,14 @@ def _mapped_packages(dist: Distribution) -> dict[str, list[str]]:
     return {name: packages} if packages else {}
 
 
-def _map_packages(acc: dict[str, list[str]], dist: Distribution) -> dict[str, list[str]]:
-    return {**acc, **_mapped_packages(dist)}
-
-
 def _distributions_packages(dists: list[Distribution]) -> dict[str, list[str]]:
     """Return a mapping of top-level packages to their distributions."""
-    return reduce(_map_packages, dists, {})
+    return {k: v for dist in dists for k, v in _mapped_packages(dist).items()}
 
 
 def _distributions_sub_packages(dists: list[Distribution]) -> dict[str, list[str]]:
     """Return the dependencies of each distribution."""
-    init: dict[str, list[str]] = {}
-    return reduce(_map_sub_packages, dists, init)
+    return {k: v for dist in dists for k, v in _dist_subpackages(dist).items()}
 
 
 @lru_cache
@@ -99,23 +203,10 @@ def _get_distributions() -> list[Distribution]:
     return list(importlib.metadata.distributions())
 
 
-def _get_packages_distributions(project_dependencies: set[str]) -> set[str]:
-    """Return the mapped top namespace from an import
-    Example:
-    A third-party library, such as opentelemetry-instrumentation-fastapi.
-    The return value would be the mapped top namespace: opentelemetry
-    Note: available for Python >= 3.10
-    """
-    # added in Python 3.10
-    dists = importlib.metadata.packages_distributions()
-    common = {k for k, v in dists.items() if project_dependencies.intersection(set(v))}
-    return common.difference(project_dependencies)
-
-
 def _to_key_with_values(acc: dict[str, list[str]], alias: str) -> dict[str, list[str]]:
     k, v = str.split(alias, "=")
     values = [str.strip(val) for val in str.split(v, ",")]
-    return {**acc, **{k: values}}
+    return {**acc, **{normalize(k.strip()): values}}
 
 
 def _parse_alias(aliases: list[str]) -> dict[str, list[str]]:
@@ -124,11 +215,10 @@ def _parse_alias(aliases: list[str]) -> dict[str, list[str]]:
 
 
 def _pick_alias(aliases: dict[str, list[str]], keys: set[str]) -> set[str]:
-    matrix = [v for k, v in aliases.items() if k in keys]
-    flattened = sum(matrix, cast(list[str], []))
-    return set(flattened)
+    return {v for k in keys for v in aliases.get(k, ())}
 
 
+# keyed by normalized name
 _KNOWN_ALIASES = {
     "beautifulsoup4": ["bs4"],
     "pillow": ["PIL"],
@@ -0,0 +1,42 @@
+"""Find where the missing dependencies of a package are imported."""
+
+from collections.abc import Callable
+
+from una.types import CheckDiff, ImportUsage
+from una.workspace import WorkspaceGraph
+
+
+def explain_diff(graph: WorkspaceGraph, diff: CheckDiff) -> dict[str, list[ImportUsage]]:
+    """
+    The imports that caused each missing dependency in `diff`.
+
+    Missing internal dependencies can be imported by any of the packages the
+    check followed, external ones only by the package itself.
+    """
+    res: dict[str, list[ImportUsage]] = {}
+    for dep in sorted(diff.int_dep_diff):
+        importers = sorted(k for k, v in diff.int_dep_imports.items() if dep in v)
+        res[dep] = _find(graph, importers, lambda i: _int_dep_name(i, graph.ns) == dep)
+    for dep in sorted(diff.ext_dep_diff):
+        importers = sorted(diff.ext_dep_imports)
+        res[dep] = _find(graph, importers, lambda i: i.split(".")[0].lower() == dep)
+    return res
+
+
+def _find(
+    graph: WorkspaceGraph, names: list[str], match: Callable[[str], bool]
+) -> list[ImportUsage]:
+    return [
+        ImportUsage(path, line, col, i)
+        for n in names
+        if n in graph.paths
+        for path, locations in sorted(graph.locations(n).items())
+        for i, line, col in locations
+        if match(i)
+    ]
+
+
+def _int_dep_name(imp: str, ns: str) -> str | None:
+    # the same rule as `workspace._only_int_dep_name`
+    parts = imp.split(".")
+    return parts[1] if imp.startswith(ns) and len(parts) > 1 else None
@@ -0,0 +1,265 @@
+"""
+Module-level graph of the imports between internal modules.
+
+Every file of every package is a node, named by its dotted module path (eg
+`myws.greeter.core`), and every import of another internal module is an edge.
+Imports of names inside a module (eg `from myws.greeter.core import greet`)
+are resolved to the longest module path that exists, and relative imports (eg
+`from .core import greet`) against the module they're in.
+
+All the files are parsed in one batch, through the import cache, so building
+the graph on a workspace that hasn't changed doesn't parse anything.
+"""
+
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from rich.console import Console
+from rich.table import Table
+
+from una import parse, timing
+from una.workspace import WorkspaceGraph
+
+
+@dataclass(frozen=True)
+class ModuleGraph:
+    # module name -> file, relative to the workspace root
+    modules: dict[str, Path]
+    # module name -> directory name of the package it's in
+    packages: dict[str, str]
+    # module name -> internal modules it imports
+    edges: dict[str, set[str]]
+
+
+@dataclass(frozen=True)
+class Metrics:
+    fan_in: dict[str, int]
+    fan_out: dict[str, int]
+    # strongly connected components with more than one module
+    cycles: list[list[str]]
+    # the longest path of imports, with each cycle counted once
+    longest_chain: list[str]
+
+
+@timing.timed("graph")
+def build_module_graph(ws: WorkspaceGraph) -> ModuleGraph:
+    found = parse.fetch_import_locations(
+        set(ws.paths.values()), ws.cache, ws.jobs, ws.engine, relative=True
+    )
+    modules: dict[str, Path] = {}
+    packages: dict[str, str] = {}
+    imports: dict[str, list[str]] = {}
+    for package, files in sorted(found.items()):
+        for path, locations in files.items():
+            rel = path.relative_to(ws.paths[package])
+            name = _module_name(rel)
+            if name != ws.ns and not name.startswith(f"{ws.ns}."):
+                # eg tests, which can't be imported by other packages
+                continue
+            modules[name] = path.relative_to(ws.root)
+            packages[name] = package
+            # relative imports start from the package, which is the module itself for an __init__
+            base = name if rel.stem == "__init__" else name.rpartition(".")[0]
+            imports[name] = [_absolute(i, base) for i, _, _ in locations]
+
+    edges: dict[str, set[str]] = {}
+    for name, imps in imports.items():
+        resolved = (_resolve(i, modules) for i in imps if i.split(".")[0] == ws.ns)
+        edges[name] = {r for r in resolved if r and r != name}
+    return ModuleGraph(modules, packages, edges)
+
+
+def get_metrics(graph: ModuleGraph) -> Metrics:
+    fan_in = dict.fromkeys(graph.modules, 0)
+    for targets in graph.edges.values():
+        for t in targets:
+            fan_in[t] += 1
+    fan_out = {m: len(t) for m, t in graph.edges.items()}
+    sccs = _sccs(graph.edges)
+    cycles = sorted((c for c in sccs if len(c) > 1), key=lambda c: (-len(c), c))
+    return Metrics(fan_in, fan_out, cycles, _longest_chain(graph.edges, sccs))
+
+
+def _module_name(rel: Path) -> str:
+    parts = list(rel.with_suffix("").parts)
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def _absolute(imp: str, base: str) -> str:
+    if not parse.is_relative(imp):
+        return imp
+    rest = imp.lstrip(".")
+    # each dot after the first goes up one package
+    for _ in range(len(imp) - len(rest) - 1):
+        base = base.rpartition(".")[0]
+    return f"{base}.{rest}" if base else rest
+
+
+def _resolve(imp: str, modules: dict[str, Path]) -> str | None:
+    parts = imp.split(".")
+    for n in range(len(parts), 0, -1):
+        name = ".".join(parts[:n])
+        if name in modules:
+            return name
+    return None
+
+
+def _sccs(edges: dict[str, set[str]]) -> list[list[str]]:
+    """Tarjan's algorithm, without recursion. Components are returned dependencies first."""
+    index: dict[str, int] = {}
+    low: dict[str, int] = {}
+    stack: list[str] = []
+    on_stack: set[str] = set()
+    res: list[list[str]] = []
+    for start in sorted(edges):
+        if start in index:
+            continue
+        index[start] = low[start] = len(index)
+        stack.append(start)
+        on_stack.add(start)
+        work = [(start, iter(sorted(edges[start])))]
+        while work:
+            node, children = work[-1]
+            for child in children:
+                if child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(edges[child]))))
+                    break
+                if child in on_stack:
+                    low[node] = min(low[node], index[child])
+            else:
+                work.pop()
+                if work:
+                    parent = work[-1][0]
+                    low[parent] = min(low[parent], low[node])
+                if low[node] == index[node]:
+                    component: list[str] = []
+                    while not component or component[-1] != node:
+                        component.append(stack.pop())
+                        on_stack.discard(component[-1])
+                    res.append(sorted(component))
+    return res
+
+
+def _longest_chain(edges: dict[str, set[str]], sccs: list[list[str]]) -> list[str]:
+    component = {m: i for i, c in enumerate(sccs) for m in c}
+    # length of the longest chain starting in each component, and the next one in it
+    length: list[int] = []
+    after: list[int | None] = []
+    for i, c in enumerate(sccs):
+        # every component's dependencies come before it, so are already done
+        nexts = {component[t] for m in c for t in edges[m]} - {i}
+        best = max(sorted(nexts), key=lambda j: length[j], default=None)
+        length.append(1 + (length[best] if best is not None else 0))
+        after.append(best)
+    if not sccs:
+        return []
+    current: int | None = max(range(len(sccs)), key=lambda i: (length[i], -i))
+    chain: list[str] = []
+    while current is not None:
+        chain.append(sccs[current][0])
+        current = after[current]
+    return chain
+
+
+def to_json(graph: ModuleGraph, metrics: Metrics) -> str:
+    data: dict[str, Any] = {
+        "nodes": [
+            {
+                "id": m,
+                "package": graph.packages[m],
+                "path": graph.modules[m].as_posix(),
+                "fan_in": metrics.fan_in[m],
+                "fan_out": metrics.fan_out[m],
+            }
+            for m in sorted(graph.modules)
+        ],
+        "edges": [[m, t] for m in sorted(graph.edges) for t in sorted(graph.edges[m])],
+        "metrics": {
+            "modules": len(graph.modules),
+            "edges": sum(len(t) for t in graph.edges.values()),
+            "cycles": metrics.cycles,
+            "longest_chain": metrics.longest_chain,
+        },
+    }
+    return json.dumps(data, indent=2)
+
+
+def to_dot(graph: ModuleGraph, metrics: Metrics) -> str:
+    lines = ["digraph una {", "  node [shape=box];"]
+    by_package: dict[str, list[str]] = {}
+    for m in sorted(graph.modules):
+        by_package.setdefault(graph.packages[m], []).append(m)
+    for package, modules in sorted(by_package.items()):
+        lines.append(f"  subgraph {_dot_id(f'cluster_{package}')} {{")
+        lines.append(f"    label={_dot_id(package)};")
+        for m in modules:
+            tooltip = f"fan-in {metrics.fan_in[m]}, fan-out {metrics.fan_out[m]}"
+            lines.append(f"    {_dot_id(m)} [tooltip={_dot_id(tooltip)}];")
+        lines.append("  }")
+    for m in sorted(graph.edges):
+        for t in sorted(graph.edges[m]):
+            lines.append(f"  {_dot_id(m)} -> {_dot_id(t)};")
+    lines.append("}")
+    return "\n".join(lines)
+
+
+def _dot_id(s: str) -> str:
+    # DOT quoted strings use the same escapes as JSON for quotes and backslashes
+    return json.dumps(s)
+
+
+def to_graphml(graph: ModuleGraph, metrics: Metrics) -> str:
+    # only needed for this format
+    import xml.etree.ElementTree as ET
+
+    root = ET.Element("graphml", xmlns="http://graphml.graphdrawing.org/xmlns")
+    attrs = {"package": "string", "path": "string", "fan_in": "int", "fan_out": "int"}
+    for name, kind in attrs.items():
+        ET.SubElement(
+            root, "key", {"id": name, "for": "node", "attr.name": name, "attr.type": kind}
+        )
+    g = ET.SubElement(root, "graph", id="una", edgedefault="directed")
+    for m in sorted(graph.modules):
+        node = ET.SubElement(g, "node", id=m)
+        values = {
+            "package": graph.packages[m],
+            "path": graph.modules[m].as_posix(),
+            "fan_in": str(metrics.fan_in[m]),
+            "fan_out": str(metrics.fan_out[m]),
+        }
+        for key, value in values.items():
+            ET.SubElement(node, "data", key=key).text = value
+    for m in sorted(graph.edges):
+        for t in sorted(graph.edges[m]):
+            ET.SubElement(g, "edge", source=m, target=t)
+    ET.indent(root)
+    return ET.tostring(root, encoding="unicode", xml_declaration=True)
+
+
+def print_summary(console: Console, graph: ModuleGraph, metrics: Metrics, top: int) -> None:
+    n_edges = sum(len(t) for t in graph.edges.values())
+    console.print(f"{len(graph.modules)} modules, {n_edges} imports between them")
+    for title, values in [("Fan-in", metrics.fan_in), ("Fan-out", metrics.fan_out)]:
+        table = Table(title=title, title_justify="left")
+        table.add_column("module")
+        table.add_column("modules", justify="right")
+        ranked = sorted(values.items(), key=lambda kv: (-kv[1], kv[0]))
+        for m, n in ranked[:top]:
+            table.add_row(m, str(n))
+        console.print(table)
+
+    if metrics.cycles:
+        console.print(f"{len(metrics.cycles)} group(s) of modules that import each other:")
+        for c in metrics.cycles:
+            console.print(f"  {', '.join(c)}")
+    else:
+        console.print("No import cycles")
+    chain = metrics.longest_chain
+    console.print(f"Longest chain ({len(chain)} modules): {' -> '.join(chain)}")
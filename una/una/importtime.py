@@ -0,0 +1,141 @@
+"""
+Measure what importing a package costs, per internal package and distribution.
+
+The package's entry modules are imported in a new interpreter run with
+`-X importtime`, and the time spent in each imported module is attributed to
+the internal package it's in, or to the distribution that provides it.
+"""
+
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+from una import distributions, stdlib
+
+# written to stderr just before the entry modules are imported,
+# so that whatever the interpreter imports on startup isn't counted
+_MARKER = "una: importing entry modules"
+
+
+@dataclass(frozen=True)
+class ImportTime:
+    module: str
+    self_us: int
+    cumulative_us: int
+    # how deeply nested the import is
+    level: int
+
+
+@dataclass(frozen=True)
+class ImportCost:
+    # internal package directory name, distribution name or top-level module
+    owner: str
+    # "internal", "external" or "stdlib"
+    kind: str
+    # time spent in the owner's own modules
+    self_us: int
+    # time from first entering one of the owner's modules, including what they import
+    cumulative_us: int
+    modules: int
+
+
+def default_python(root: Path) -> str:
+    """The interpreter of the workspace's virtual environment, if it has one."""
+    venv = root / ".venv"
+    for exe in [venv / "bin" / "python", venv / "Scripts" / "python.exe"]:
+        if exe.exists():
+            return str(exe)
+    return sys.executable
+
+
+def measure(python: str, modules: list[str], paths: list[Path], cwd: Path) -> list[ImportTime]:
+    """
+    Import `modules` with `python`, and return the time spent in each module.
+
+    `paths` are prepended to PYTHONPATH, so that internal packages can be
+    imported even if they haven't been installed in the environment.
+    """
+    code = "\n".join(
+        [
+            "import sys",
+            f"sys.stderr.write({(_MARKER + chr(10))!r})",
+            "sys.stderr.flush()",
+            *(f"__import__({m!r})" for m in modules),
+        ]
+    )
+    pythonpath = [str(p) for p in paths]
+    if os.environ.get("PYTHONPATH"):
+        pythonpath.append(os.environ["PYTHONPATH"])
+    res = subprocess.run(
+        [python, "-X", "importtime", "-c", code],
+        cwd=cwd,
+        env={**os.environ, "PYTHONPATH": os.pathsep.join(pythonpath)},
+        capture_output=True,
+        text=True,
+    )
+    if res.returncode != 0:
+        raise RuntimeError(_without_timings(res.stderr).strip() or "Importing failed")
+    return parse_importtime(res.stderr)
+
+
+def parse_importtime(stderr: str) -> list[ImportTime]:
+    """The timings in `-X importtime` output after the marker, in the order printed."""
+    _, _, after = stderr.partition(_MARKER)
+    res: list[ImportTime] = []
+    for line in after.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        self_us, cumulative_us, name = line.removeprefix("import time:").split("|")
+        if not self_us.strip().isdigit():
+            continue
+        level = (len(name) - len(name.lstrip()) - 1) // 2
+        res.append(ImportTime(name.strip(), int(self_us), int(cumulative_us), level))
+    return res
+
+
+def attribute(times: list[ImportTime], ns: str, root: Path | None = None) -> list[ImportCost]:
+    """The cost of each internal package and distribution, most expensive first."""
+    index = distributions.get_index(root)
+    by_import = {i: dist for dist, imports in index.provides.items() for i in imports}
+    std = stdlib.get_stdlib() | set(sys.stdlib_module_names)
+
+    self_us: dict[tuple[str, str], int] = {}
+    cumulative_us: dict[tuple[str, str], int] = {}
+    modules: dict[tuple[str, str], int] = {}
+    # the output lists each module after the ones it imports, so reversed,
+    # every module comes right after the module that imported it
+    stack: list[tuple[int, tuple[str, str]]] = []
+    for t in reversed(times):
+        owner = _owner(t.module, ns, by_import, std)
+        while stack and stack[-1][0] >= t.level:
+            stack.pop()
+        if not stack or stack[-1][1] != owner:
+            cumulative_us[owner] = cumulative_us.get(owner, 0) + t.cumulative_us
+        stack.append((t.level, owner))
+        self_us[owner] = self_us.get(owner, 0) + t.self_us
+        modules[owner] = modules.get(owner, 0) + 1
+
+    costs = [
+        ImportCost(name, kind, self_us[(name, kind)], cumulative_us[(name, kind)], n)
+        for (name, kind), n in modules.items()
+    ]
+    return sorted(costs, key=lambda c: (-c.self_us, c.owner))
+
+
+def _owner(module: str, ns: str, by_import: dict[str, str], std: set[str]) -> tuple[str, str]:
+    parts = module.split(".")
+    if parts[0] == ns:
+        return (parts[1] if len(parts) > 1 else ns, "internal")
+    if parts[0] in std:
+        return ("stdlib", "stdlib")
+    return (by_import.get(parts[0], parts[0]), "external")
+
+
+def _without_timings(stderr: str) -> str:
+    return "\n".join(
+        line
+        for line in stderr.splitlines()
+        if not line.startswith("import time:") and line != _MARKER
+    )
@@ -0,0 +1,108 @@
+"""
+Where the workspace members are, computed once per process.
+
+The layout can also be persisted as a manifest in `.una_cache/layout.json`,
+which the hatch-una build hooks read instead of globbing for every wheel.
+The manifest is trusted while the root pyproject.toml and the directories
+the member globs are expanded in are unchanged (by mtime), so adding or
+removing a package invalidates it.
+
+hatch-una doesn't depend on una, so `hatch_una.util` has its own reader:
+keep the two in sync when changing the format (and bump LAYOUT_VERSION).
+"""
+
+import json
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from una import cache, config, consts, timing
+
+LAYOUT_FILE = "layout.json"
+LAYOUT_VERSION = 1
+
+Stamps = tuple[tuple[str, int], ...]
+
+
+@dataclass(frozen=True)
+class Layout:
+    root: Path
+    members: list[str]
+    # package directory name -> package directory
+    packages: dict[str, Path]
+
+
+def get_layout(root: Path) -> Layout:
+    members = config.get_members(root)
+    return _get_layout(root, tuple(members), _stamps(root, members))
+
+
+def save_manifest(root: Path) -> None:
+    """Persist the layout, unless the manifest on disk is already up to date."""
+    layout = get_layout(root)
+    if read_manifest(root) == layout:
+        return
+    members = layout.members
+    data = {
+        "version": LAYOUT_VERSION,
+        "members": members,
+        "stamps": dict(_stamps(root, members)),
+        "packages": {k: v.relative_to(root).as_posix() for k, v in layout.packages.items()},
+    }
+    cache.write_json(root, LAYOUT_FILE, data)
+
+
+def read_manifest(root: Path) -> Layout | None:
+    """The persisted layout, or None if it's missing or out of date."""
+    try:
+        with (cache.get_cache_dir(root) / LAYOUT_FILE).open(encoding="utf-8") as f:
+            data: dict[str, Any] = json.load(f)
+    except (OSError, ValueError):
+        return None
+    members: list[str] = data.get("members", [])
+    if data.get("version") != LAYOUT_VERSION or members != config.get_members(root):
+        return None
+    if data.get("stamps") != dict(_stamps(root, members)):
+        return None
+    packages: dict[str, str] = data.get("packages", {})
+    return Layout(root, members, {k: root / v for k, v in packages.items()})
+
+
+@lru_cache
+@timing.timed("glob")
+def _get_layout(root: Path, members: tuple[str, ...], stamps: Stamps) -> Layout:
+    # stamps are only there so that the layout is found again when packages are added
+    return read_manifest(root) or _scan(root, list(members))
+
+
+def _scan(root: Path, members: list[str]) -> Layout:
+    packages: dict[str, Path] = {}
+    for glob in members:
+        for p in sorted(root.glob(glob)):
+            packages.setdefault(p.name, p)
+    return Layout(root, members, packages)
+
+
+def _stamps(root: Path, members: list[str]) -> Stamps:
+    """The mtime of everything that can change the layout."""
+    paths = [consts.PYPROJ_FILE, *(_glob_base(g) for g in members)]
+    res: dict[str, int] = {}
+    for p in paths:
+        try:
+            res[p] = (root / p).stat().st_mtime_ns
+        except FileNotFoundError:
+            res[p] = 0
+    return tuple(sorted(res.items()))
+
+
+def _glob_base(glob: str) -> str:
+    """The directory a glob is expanded in, eg `libs` for `libs/*`."""
+    parts = Path(glob).parts
+    # for a plain path, the directory it's in
+    n = next((i for i, p in enumerate(parts) if _is_glob(p)), len(parts) - 1)
+    return Path(*parts[:n]).as_posix()
+
+
+def _is_glob(part: str) -> bool:
+    return any(c in part for c in "*?[")
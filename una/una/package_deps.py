@@ -1,30 +1,68 @@
 import re
+from fnmatch import fnmatchcase
 from pathlib import Path
 
-from una import config
+from una import config, layout, timing
 from una.types import ConfWrapper, ExtDep, IntDep, PackageDeps
 
 
-def get_packages(root: Path) -> list[PackageDeps]:
-    confs = get_package_confs(root)
-    packages = [_get_package_deps(c) for c in confs if Path.cwd().name in c.path.as_posix()]
-    return packages
+def get_packages(confs: list[ConfWrapper]) -> list[PackageDeps]:
+    return [_get_package_deps(c) for c in confs]
 
 
+def select_packages(
+    packages: list[PackageDeps],
+    root: Path,
+    patterns: list[str] | None = None,
+    all_packages: bool = False,
+) -> list[PackageDeps]:
+    """
+    The packages to work on.
+
+    With `all_packages`, that's every package. Otherwise each of `patterns` selects
+    the packages whose name, directory name or path relative to `root` it matches
+    (they can be globs, eg `libs/*`). Without either, the package containing the
+    current directory is selected, or every package if it's not inside one.
+    """
+    if all_packages:
+        return packages
+    if patterns:
+        selected: list[PackageDeps] = []
+        for pattern in patterns:
+            matches = [p for p in packages if _matches(p, root, pattern)]
+            if not matches:
+                raise ValueError(f"No package matches '{pattern}'")
+            selected.extend(m for m in matches if m not in selected)
+        return [p for p in packages if p in selected]
+    cwd = Path.cwd().resolve()
+    inside = [p for p in packages if cwd.is_relative_to(p.path.resolve())]
+    return inside or packages
+
+
+def _matches(package: PackageDeps, root: Path, pattern: str) -> bool:
+    rel = package.path.resolve().relative_to(root.resolve()).as_posix()
+    names = (package.name, package.path.name, rel)
+    return any(fnmatchcase(n, pattern.rstrip("/")) for n in names)
+
+
+@timing.timed("glob")
 def get_package_confs(root: Path) -> list[ConfWrapper]:
-    members = config.get_members(root)
-    packages: list[ConfWrapper] = []
-    for glob in members:
-        package_files = sorted(root.glob(glob))
-        packages.extend([ConfWrapper(conf=config.load_conf(p), path=p) for p in package_files])
-    return packages
+    package_dirs = layout.get_layout(root).packages.values()
+    return [ConfWrapper(conf=config.load_conf(p), path=p) for p in package_dirs]
+
+
+def dep_name(dep: str) -> str:
+    """The name of the package in a dependency specifier, as una reads it."""
+    return _parse_deps_table(dep).name
 
 
 def _parse_deps_table(dep: str) -> ExtDep:
-    parts: list[str] = re.split(r"[\^~=!<>]", dep)
+    # the environment markers (eg `; sys_platform == 'win32'`) aren't part of the name
+    spec, *_ = dep.split(";")
+    parts: list[str] = re.split(r"[\^~=!<>]", spec)
     name, *_ = parts if parts else [""]
     version = dep.replace(name, "")
-    return ExtDep(name, version)
+    return ExtDep(name.strip(), version)
 
 
 def _get_package_deps(conf: ConfWrapper) -> PackageDeps:
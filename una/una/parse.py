@@ -1,13 +1,70 @@
 import ast
-from functools import lru_cache
+from collections.abc import Callable
+from enum import StrEnum
+from functools import partial
 from pathlib import Path
+from typing import TYPE_CHECKING
 
-from una.types import Imports
+from una import timing
 
+if TYPE_CHECKING:
+    from una.cache import ImportCache
+    from una.types import ImportLocation, Imports
 
-def fetch_all_imports(paths: set[Path]) -> Imports:
-    rows = [{p.name: _list_imports(p)} for p in paths]
-    return {k: v for row in rows for k, v in row.items()}
+
+class Engine(StrEnum):
+    """How imports are found in a parsed module."""
+
+    # walk every node in the tree
+    AST = "ast"
+    # only visit statements, see `_extract_imports_fast`
+    FAST = "fast"
+
+
+# below this many uncached files, starting worker processes costs more than it saves
+PARALLEL_MIN_FILES = 64
+_MAX_CHUNK_SIZE = 256
+
+
+@timing.timed("parse")
+def fetch_all_imports(
+    paths: set[Path],
+    cache: "ImportCache | None" = None,
+    jobs: int = 1,
+    engine: Engine = Engine.AST,
+) -> "Imports":
+    modules = {p.name: sorted(p.rglob("*.py")) for p in paths}
+    files = [m for ms in modules.values() for m in ms]
+    extracted = _extract_all(files, cache, jobs, engine)
+    return {
+        name: {i for m in ms for i, _, _ in extracted[m] if not is_relative(i)}
+        for name, ms in modules.items()
+    }
+
+
+def fetch_import_locations(
+    paths: set[Path],
+    cache: "ImportCache | None" = None,
+    jobs: int = 1,
+    engine: Engine = Engine.AST,
+    relative: bool = False,
+) -> "dict[str, dict[Path, list[ImportLocation]]]":
+    """
+    Like `fetch_all_imports`, but with the line and column of every import in each file.
+
+    With `relative`, relative imports are included too, as written (eg `.core.greet`).
+    """
+    modules = {p.name: sorted(p.rglob("*.py")) for p in paths}
+    files = [m for ms in modules.values() for m in ms]
+    extracted = _extract_all(files, cache, jobs, engine)
+    return {
+        name: {m: [loc for loc in extracted[m] if relative or not is_relative(loc[0])] for m in ms}
+        for name, ms in modules.items()
+    }
+
+
+def is_relative(imp: str) -> bool:
+    return imp.startswith(".")
 
 
 def _parse_import(node: ast.Import) -> list[str | None]:
@@ -19,7 +76,11 @@ def _extract_import_from(node: ast.ImportFrom) -> list[str | None]:
 
 
 def _parse_import_from(node: ast.ImportFrom) -> list[str | None]:
-    return _extract_import_from(node) if node.module and node.level == 0 else []
+    if node.level == 0:
+        return _extract_import_from(node) if node.module else []
+    # kept with their leading dots, only the module graph can resolve them
+    prefix = "." * node.level + (f"{node.module}." if node.module else "")
+    return [f"{prefix}{alias.name}" for alias in node.names]
 
 
 def _parse_imports(node: ast.AST) -> list[str | None]:
@@ -30,20 +91,102 @@ def _parse_imports(node: ast.AST) -> list[str | None]:
     return []
 
 
-@lru_cache
-def _parse_module(path: Path) -> ast.AST:
+def _locate_imports(node: ast.Import | ast.ImportFrom) -> "list[ImportLocation]":
+    # columns are 1-based, like in the messages of most tools
+    return [(i, node.lineno, node.col_offset + 1) for i in _parse_imports(node) if i is not None]
+
+
+def _read_module(path: Path) -> str:
     with open(path.as_posix(), encoding="utf-8", errors="ignore") as f:
-        tree = ast.parse(f.read(), path.name)
-    return tree
+        return f.read()
 
 
-def _extract_imports(path: Path) -> list[str]:
-    tree = _parse_module(path)
-    return [i for node in ast.walk(tree) for i in _parse_imports(node) if i is not None]
+def _parse_module(path: Path) -> ast.AST:
+    return ast.parse(_read_module(path), path.name)
 
 
-def _list_imports(path: Path) -> set[str]:
-    py_modules = path.rglob("*.py")
-    extracted = (_extract_imports(m) for m in py_modules)
-    flattened = (i for imports in extracted for i in imports)
-    return set(flattened)
+def _extract_imports(path: Path) -> "list[ImportLocation]":
+    tree = _parse_module(path)
+    return [
+        loc
+        for node in ast.walk(tree)
+        if isinstance(node, ast.Import | ast.ImportFrom)
+        for loc in _locate_imports(node)
+    ]
+
+
+def _extract_imports_fast(path: Path) -> "list[ImportLocation]":
+    """
+    Same result as `_extract_imports`, but only visits statements.
+
+    Import statements can only appear in statement bodies (never inside an expression),
+    so there's no need to walk the (much larger) expression trees.
+    Files that don't contain the word "import" at all aren't parsed.
+    """
+    source = _read_module(path)
+    if "import" not in source:
+        return []
+    tree = ast.parse(source, path.name)
+    res: list[ImportLocation] = []
+    stack: list[ast.stmt] = list(reversed(tree.body))
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ast.Import | ast.ImportFrom):
+            res.extend(_locate_imports(node))
+            continue
+        # reversed so that imports are returned in source order
+        for field in ("finalbody", "orelse", "body"):
+            stack.extend(reversed(getattr(node, field, ())))
+        for block in reversed(getattr(node, "handlers", None) or getattr(node, "cases", ())):
+            stack.extend(reversed(block.body))
+    return res
+
+
+_ENGINES: "dict[Engine, Callable[[Path], list[ImportLocation]]]" = {
+    Engine.AST: _extract_imports,
+    Engine.FAST: _extract_imports_fast,
+}
+
+
+def _extract_chunk(paths: list[Path], engine: Engine = Engine.AST) -> "list[list[ImportLocation]]":
+    extract = _ENGINES[engine]
+    return [extract(p) for p in paths]
+
+
+def _chunks(paths: list[Path], jobs: int) -> list[list[Path]]:
+    size = max(1, min(_MAX_CHUNK_SIZE, len(paths) // (jobs * 4)))
+    return [paths[i : i + size] for i in range(0, len(paths), size)]
+
+
+def _extract_many(paths: list[Path], jobs: int, engine: Engine) -> "list[list[ImportLocation]]":
+    if jobs <= 1 or len(paths) < PARALLEL_MIN_FILES:
+        return _extract_chunk(paths, engine)
+    # only imported when needed, as it pulls in multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(partial(_extract_chunk, engine=engine), _chunks(paths, jobs))
+        return [imports for chunk in results for imports in chunk]
+
+
+def _extract_all(
+    paths: list[Path], cache: "ImportCache | None", jobs: int, engine: Engine
+) -> "dict[Path, list[ImportLocation]]":
+    res: dict[Path, list[ImportLocation]] = {}
+    todo: list[Path] = []
+    for p in paths:
+        cached = cache.get(p) if cache else None
+        if cached is None:
+            todo.append(p)
+        else:
+            res[p] = cached
+    timing.count("files parsed", len(todo))
+    if cache:
+        timing.count("import cache hits", len(res))
+        timing.count("import cache misses", len(todo))
+    stamps = {p: cache.stamp(p) for p in todo} if cache else {}
+    for p, imports in zip(todo, _extract_many(todo, jobs, engine), strict=True):
+        res[p] = imports
+        if cache:
+            cache.set(p, imports, stamps[p])
+    return res
@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+from rich.console import Console
+from rich.table import Table
+
+from una import config, distributions, timing
+
+
+def print_summary(console: Console) -> None:
+    """Print the time spent in each phase, and all counters and cache statistics."""
+    totals = timing.snapshot()
+    calls = timing.calls()
+    wall = sum(totals.values()) or 1.0
+
+    phases = Table(title="Phases", title_justify="left")
+    phases.add_column("phase")
+    phases.add_column("calls", justify="right")
+    phases.add_column("ms", justify="right")
+    phases.add_column("%", justify="right")
+    for name, seconds in sorted(totals.items(), key=lambda kv: -kv[1]):
+        pct = 100 * seconds / wall
+        phases.add_row(name, str(calls.get(name, 0)), f"{seconds * 1000:.1f}", f"{pct:.1f}")
+    console.print(phases)
+
+    counters = Table(title="Counters", title_justify="left")
+    counters.add_column("counter")
+    counters.add_column("value", justify="right")
+    for name, value in sorted(_counters().items()):
+        counters.add_row(name, value)
+    console.print(counters)
+
+
+def write_trace(path: Path) -> None:
+    """Write the recorded phases as a Chrome trace, which speedscope can also read."""
+    with path.open("w", encoding="utf-8") as f:
+        json.dump({"traceEvents": timing.trace_events(), "displayTimeUnit": "ms"}, f)
+
+
+def _counters() -> dict[str, str]:
+    res = {k: str(v) for k, v in timing.counters().items()}
+    lru_caches = {
+        "config._load_conf": config._load_conf,  # pyright:ignore[reportPrivateUsage]
+        "distributions.get_index": distributions.get_index,
+        "distributions._get_distributions": distributions._get_distributions,  # pyright:ignore[reportPrivateUsage]
+    }
+    for name, fn in lru_caches.items():
+        info = fn.cache_info()
+        res[f"{name} hits/misses"] = f"{info.hits}/{info.misses}"
+    return res
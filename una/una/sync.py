@@ -1,26 +1,104 @@
+import os
+import shutil
 from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Any
 
-from una import config, consts
-from una.types import CheckDiff, Conf, UvSourceIsWorkspace
+from una import consts, package_deps
+from una.types import CheckDiff
 
 
-def sync_package(diff: CheckDiff):
-    _rewrite_package_pyproj(diff.package.path, diff.int_dep_diff)
+def sync_packages(diffs: list[CheckDiff], jobs: int = 1, prune: bool = False) -> list[Path]:
+    """
+    Add the missing internal dependencies of all `diffs` to their pyproject.toml,
+    and with `prune`, remove the unused ones.
 
+    All the edits are worked out before any file is written, and only files whose
+    content changes are written (atomically), so the mtimes of the others are kept.
+    Returns the files that were written.
+    """
+    edits = plan_edits(diffs, prune)
+    if jobs > 1 and len(edits) > 1:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            list(pool.map(_write_atomic, edits.keys(), edits.values()))
+    else:
+        for path, content in edits.items():
+            _write_atomic(path, content)
+    return list(edits)
 
-def _generate_updated_package(conf: Conf, packages: Iterable[str]) -> str | None:
+
+def plan_edits(diffs: list[CheckDiff], prune: bool = False) -> dict[Path, str]:
+    """The new content of each pyproject.toml that needs to change."""
+    edits: dict[Path, str] = {}
+    for d in diffs:
+        remove: set[str] = d.unused_deps if prune else set()
+        if not (d.int_dep_diff or remove):
+            continue
+        path = d.package.path / consts.PYPROJ_FILE
+        content = path.read_text(encoding="utf-8")
+        try:
+            generated = _generate_updated_package(content, d.int_dep_diff, remove)
+        except ValueError as e:
+            raise ValueError(f"Can't update '{path}': {e}") from e
+        if generated and generated != content:
+            edits[path] = generated
+    return edits
+
+
+def _generate_updated_package(
+    content: str, packages: Iterable[str], remove: Iterable[str] = ()
+) -> str | None:
+    """
+    Add `packages` as workspace dependencies to the pyproject.toml in `content`,
+    and remove the dependencies named in `remove`.
+
+    Only project.dependencies and tool.uv.sources are modified, everything else
+    (including comments and formatting) is kept as it was.
+    """
+    # only needed to modify files, which most runs don't do
+    import tomlkit
+    from tomlkit.items import Array, Table
+
+    packages = sorted(packages)
+    to_remove = set(remove)
+    if not (packages or to_remove):
+        return None
+    tomldoc = tomlkit.parse(content)
+
+    project = tomldoc.setdefault("project", tomlkit.table())
+    deps = project.setdefault("dependencies", tomlkit.array())
+    if not isinstance(deps, Array):
+        raise ValueError("project.dependencies isn't an array")
+    for i in reversed(range(len(deps))):
+        if package_deps.dep_name(str(deps[i])) in to_remove:
+            del deps[i]
     for p in packages:
-        conf.project.dependencies.append(p)
-        conf.tool.uv.sources[p] = UvSourceIsWorkspace(workspace=True)
-    return conf.to_str()
-
-
-def _rewrite_package_pyproj(path: Path, packages: Iterable[str]):
-    conf = config.load_conf(path)
-    generated = _generate_updated_package(conf, packages)
-    if not generated:
-        return
-    fullpath = path / consts.PYPROJ_FILE
-    with fullpath.open("w", encoding="utf-8") as f:
-        f.write(generated)
+        if p not in deps:
+            deps.append(p)  # pyright:ignore[reportUnknownMemberType]
+
+    if to_remove:
+        # tomlkit's types don't narrow through the nested tables
+        doc: Any = tomldoc
+        for p in to_remove:
+            doc.get("tool", {}).get("uv", {}).get("sources", {}).pop(p, None)
+    if not packages:
+        return tomlkit.dumps(tomldoc)
+
+    tool = tomldoc.setdefault("tool", tomlkit.table(True))
+    uv = tool.setdefault("uv", tomlkit.table(True))
+    sources = uv.setdefault("sources", tomlkit.table())
+    if not isinstance(sources, Table):
+        raise ValueError("tool.uv.sources isn't a table")
+    for p in packages:
+        # parsed rather than built, to get the same spacing as una's templates
+        sources[p] = tomlkit.parse("source = { workspace = true }")["source"]
+    return tomlkit.dumps(tomldoc)
+
+
+def _write_atomic(path: Path, content: str) -> None:
+    # write next to the file and rename, so it's never left partly written
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    tmp.write_text(content, encoding="utf-8")
+    shutil.copymode(path, tmp)
+    tmp.replace(path)
@@ -0,0 +1,106 @@
+"""
+Process-wide phase timers and counters.
+
+Time spent in nested phases is only counted towards the innermost one,
+so the totals of all phases add up to the time spent in any of them.
+With `start_trace`, every phase is also recorded as a span for `trace_events`.
+"""
+
+import os
+import time
+from collections import defaultdict
+from collections.abc import Callable, Generator
+from contextlib import contextmanager
+from functools import wraps
+from typing import ParamSpec, TypeVar
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+_totals: dict[str, float] = defaultdict(float)
+_calls: dict[str, int] = defaultdict(int)
+_counters: dict[str, int] = defaultdict(int)
+# the phases currently running, and when each was last (re)started
+_stack: list[tuple[str, float]] = []
+# (name, start, end) of every phase, only recorded while tracing
+_spans: list[tuple[str, float, float]] | None = None
+_origin = time.perf_counter()
+
+
+@contextmanager
+def phase(name: str) -> Generator[None]:
+    start = time.perf_counter()
+    if _stack:
+        outer, outer_start = _stack[-1]
+        _totals[outer] += start - outer_start
+    _stack.append((name, start))
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        _, started = _stack.pop()
+        _totals[name] += end - started
+        _calls[name] += 1
+        if _stack:
+            _stack[-1] = (_stack[-1][0], end)
+        if _spans is not None:
+            _spans.append((name, start, end))
+
+
+def count(name: str, n: int = 1) -> None:
+    """Increment a counter, eg for cache hits or files parsed."""
+    _counters[name] += n
+
+
+def timed(name: str) -> Callable[[Callable[P, R]], Callable[P, R]]:
+    """Decorator version of `phase`."""
+
+    def decorator(fn: Callable[P, R]) -> Callable[P, R]:
+        @wraps(fn)
+        def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with phase(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def snapshot() -> dict[str, float]:
+    """Total seconds spent in each phase so far."""
+    return dict(_totals)
+
+
+def since(before: dict[str, float]) -> dict[str, float]:
+    """Seconds spent in each phase since `before` was taken with `snapshot`."""
+    return {k: v - before.get(k, 0.0) for k, v in sorted(_totals.items())}
+
+
+def calls() -> dict[str, int]:
+    """Number of times each phase has been entered."""
+    return dict(_calls)
+
+
+def counters() -> dict[str, int]:
+    return dict(_counters)
+
+
+def start_trace() -> None:
+    global _spans
+    _spans = []
+
+
+def trace_events() -> list[dict[str, str | int | float]]:
+    """Recorded spans in the Chrome trace event format (also read by speedscope)."""
+    pid = os.getpid()
+    return [
+        {
+            "name": name,
+            "ph": "X",
+            "ts": (start - _origin) * 1e6,
+            "dur": (end - start) * 1e6,
+            "pid": pid,
+            "tid": 0,
+        }
+        for name, start, end in sorted(_spans or [], key=lambda s: s[1])
+    ]
@@ -1,14 +1,11 @@
-from collections.abc import Callable
-from copy import deepcopy
+import tomllib
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import TYPE_CHECKING, TypeAlias, TypeVar
+from typing import Any, TypeAlias
 
-import tomlkit
-from dataclasses_json import dataclass_json
-
-Json: TypeAlias = dict[str, "Json"] | list["Json"] | str | int | float | bool | None
 Imports: TypeAlias = dict[str, set[str]]
+# an import, and the line and (1-based) column of the statement it's in
+ImportLocation: TypeAlias = tuple[str, int, int]
 
 
 @dataclass(frozen=True)
@@ -38,21 +35,40 @@ class CheckDiff:
     ext_dep_imports: Imports
     int_dep_diff: set[str]
     ext_dep_diff: set[str]
+    # declared dependencies that aren't imported, only found if asked for
+    unused_deps: set[str] = field(default_factory=set)
+
+
+@dataclass(frozen=True)
+class TreeState:
+    """The git commit checked out, and the files that differed from it."""
+
+    commit: str
+    # relative to the workspace root
+    changed: list[str]
 
 
-def _rename_keys(old: str, new: str) -> Callable[[Json], None]:
-    def rename(d: Json) -> None:
-        if isinstance(d, dict):
-            for k, v in list(d.items()):
-                rename(v)
-                if old in k:
-                    d[k.replace(old, new)] = d.pop(k)
+@dataclass(frozen=True)
+class ImportUsage:
+    """Where a missing dependency is imported."""
 
-    return rename
+    path: Path
+    line: int
+    col: int
+    name: str
 
 
-@dataclass_json
 @dataclass(frozen=True)
+class BuildResult:
+    package: PackageDeps
+    ok: bool
+    seconds: float = 0.0
+    output: str = ""
+    skipped: bool = False
+    reused: bool = False
+
+
+@dataclass(frozen=True, slots=True)
 class Project:
     name: str = ""
     dependencies: list[str] = field(default_factory=list)
@@ -64,113 +80,81 @@ def _default_members() -> list[str]:
     return ["libs/*", "apps/*"]
 
 
-@dataclass_json
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class UvWorkspace:
     members: list[str] = field(default_factory=_default_members)
 
 
-@dataclass_json
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class UvSourceIsWorkspace:
     workspace: bool = False
 
 
-@dataclass_json
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Uv:
     workspace: UvWorkspace = field(default_factory=UvWorkspace)
     sources: dict[str, UvSourceIsWorkspace] = field(default_factory=dict)
 
 
-@dataclass_json
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Una:
     namespace: str | None = None
     requires_python: str | None = None
 
 
-@dataclass_json
-@dataclass(frozen=False)
+@dataclass(frozen=True, slots=True)
 class Tool:
     uv: Uv = field(default_factory=Uv)
     una: Una = field(default_factory=Una)
 
 
-Self = TypeVar("Self", bound="Conf")
-
-
-@dataclass_json
-@dataclass()
+@dataclass(frozen=True, slots=True)
 class Conf:
     """
-    Conf object.
+    The parts of a pyproject.toml that una reads.
 
-    Should never be created manually, only loaded from a toml file.
-    See the caveats on `to_str()`.
+    This is read-only: see `sync` for how files are modified.
     """
 
-    tool: Tool
+    tool: Tool = field(default_factory=Tool)
     project: Project = field(default_factory=Project)
-    _tomldoc: tomlkit.TOMLDocument | None = field(default=None)
-
-    if TYPE_CHECKING:
-        # these are just here becaue dataclass_json doesn't
-        # seem to play well with pyright?
-        @classmethod
-        def from_dict(cls: type[Self], _: Json) -> Self:
-            raise
 
     @classmethod
-    def from_tomldoc(cls: type[Self], tomldoc: tomlkit.TOMLDocument) -> Self:
-        orig = deepcopy(tomldoc)
-        _rename_keys("-", "_")(tomldoc)
-        res = cls.from_dict(tomldoc)
-        res._tomldoc = orig
-        return res
-
-    def to_tomldoc(self) -> tomlkit.TOMLDocument:
-        tomldoc = self._tomldoc
-        if not tomldoc:
-            raise ValueError("This Conf has no _tomldoc member. This should not happen")
-
-        # impossible for project.dependencies to be unset as validated on load
-        orig_deps: list[str] = tomldoc["project"]["dependencies"]  # type: ignore[reportIndexIssues]
-        new_deps = set(self.project.dependencies) - set(orig_deps)
-        for dep in new_deps:
-            tomldoc["project"]["dependencies"].add_line(dep)  # type: ignore[reportIndexIssues]
-
-        # deal with a a non-existent tool.una.deps
-        try:
-            tomldoc["tool"]["uv"]["sources"].update(self.tool.uv.sources)  # type: ignore[reportIndexIssues]
-        except KeyError:
-            una = tomlkit.table(True)
-            deps = tomlkit.table()
-            deps.update(self.tool.una.deps)  # type: ignore[reportUnknownMemberType]
-            una.append("deps", deps)
-            tomldoc["tool"].append("una", una)  # type: ignore[reportIndexIssues]
-        return tomldoc
+    def from_str(cls, s: str) -> "Conf":
+        return cls.from_dict(tomllib.loads(s))
 
     @classmethod
-    def from_str(cls: type[Self], s: str) -> Self:
-        tomldoc = tomlkit.loads(s)
-        return cls.from_tomldoc(tomldoc)
-
-    def to_str(self) -> str:
-        """
-        Dump the config to a string.
-
-        To preserve the original formatting and make my life easy, this function
-        will currently only modify the following fields:
-        - project.dependencies
-        - tool.uv.sources
-        - tool.hatch.build.hooks.una-build
-        - tool.hatch.meta.hooks.una-meta
-
-        All others will be written from the original toml file.
-        """
-        tomldoc = self.to_tomldoc()
-        return tomlkit.dumps(tomldoc)  # type: ignore[reportUnknownMemberType]
+    def from_dict(cls, d: dict[str, Any]) -> "Conf":
+        project = _table(d, "project")
+        tool = _table(d, "tool")
+        uv = _table(tool, "uv")
+        una = _table(tool, "una")
+        sources = {
+            k: UvSourceIsWorkspace(workspace=bool(v.get("workspace", False)))  # pyright:ignore[reportUnknownMemberType,reportUnknownArgumentType]
+            for k, v in _table(uv, "sources").items()  # pyright:ignore[reportAny]
+            if isinstance(v, dict)
+        }
+        workspace = _table(uv, "workspace")
+        return cls(
+            tool=Tool(
+                uv=Uv(
+                    workspace=UvWorkspace(workspace.get("members", _default_members())),
+                    sources=sources,
+                ),
+                una=Una(una.get("namespace"), una.get("requires-python")),
+            ),
+            project=Project(
+                name=project.get("name", ""),
+                dependencies=project.get("dependencies", []),
+                version=project.get("version"),
+                requires_python=project.get("requires-python", ">= 3.8"),
+            ),
+        )
+
+
+def _table(d: dict[str, Any], key: str) -> dict[str, Any]:
+    res = d.get(key, {})
+    return res if isinstance(res, dict) else {}  # pyright:ignore[reportUnknownVariableType]
 
 
 @dataclass(frozen=True)
@@ -0,0 +1,149 @@
+import importlib
+import time
+from collections.abc import Callable, Iterator
+from pathlib import Path
+from typing import Any
+
+from una import changes, check, consts, package_deps, parse
+from una.cache import ImportCache
+from una.types import CheckDiff, PackageDeps
+from una.workspace import WorkspaceGraph
+
+POLL_INTERVAL = 0.5
+
+
+class Watcher:
+    """
+    Keep the workspace graph in memory and re-check packages as their files change.
+
+    Parsed imports are kept per file in the `ImportCache`, so when a file changes
+    only that file is parsed again, and only the packages that (transitively)
+    depend on its package are re-checked.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        ns: str,
+        alias: list[str],
+        cache: ImportCache,
+        jobs: int = 1,
+        engine: parse.Engine = parse.Engine.AST,
+        fuzzy: bool = False,
+        patterns: list[str] | None = None,
+        all_packages: bool = False,
+        unused: bool = False,
+    ):
+        self.root: Path = root
+        self.ns: str = ns
+        self.alias: list[str] = alias
+        self.cache: ImportCache = cache
+        self.jobs: int = jobs
+        self.engine: parse.Engine = engine
+        self.fuzzy: bool = fuzzy
+        self.patterns: list[str] | None = patterns
+        self.all_packages: bool = all_packages
+        self.unused: bool = unused
+        self.graph: WorkspaceGraph = WorkspaceGraph.build(root, ns, cache, jobs, engine)
+        self.every_package: list[PackageDeps]
+        self.packages: list[PackageDeps]
+        self.every_package, self.packages = self._select()
+        self.results: dict[str, CheckDiff] = {}
+
+    def check_all(self) -> list[CheckDiff]:
+        self.results = {}
+        return self._check({p.name for p in self.packages})
+
+    def update(self, files: set[Path]) -> list[CheckDiff]:
+        """Re-check everything affected by `files`, returning the results that changed."""
+        # a change in a package that isn't selected can still affect those that are
+        owners = changes.owning_packages(self.root, list(files), self.every_package)
+        if owners is None or any(f.name == consts.PYPROJ_FILE for f in files):
+            # dependencies or workspace members may have changed
+            self.graph = WorkspaceGraph.build(
+                self.root, self.ns, self.cache, self.jobs, self.engine
+            )
+            self.every_package, self.packages = self._select()
+            names = {p.name for p in self.packages}
+            self.results = {k: v for k, v in self.results.items() if k in names}
+            if owners is None:
+                return self._check(names)
+        for p in self.every_package:
+            if p.name in owners:
+                self.graph.invalidate(p.path.name)
+        # only the selected ones are checked
+        return self._check(changes.affected_packages(owners, self.every_package, self.results))
+
+    def _select(self) -> tuple[list[PackageDeps], list[PackageDeps]]:
+        """Every package in the workspace, and the selected ones."""
+        packages = package_deps.get_packages(self.graph.confs)
+        selected = package_deps.select_packages(
+            packages, self.root, self.patterns, self.all_packages
+        )
+        return packages, selected
+
+    def _check(self, names: set[str]) -> list[CheckDiff]:
+        to_check = [p for p in self.packages if p.name in names]
+        self.graph.prefetch({d.name for p in to_check for d in p.int_deps})
+        changed: list[CheckDiff] = []
+        for p in to_check:
+            d = check.check_package_deps(self.graph, p, self.alias, self.fuzzy, self.unused)
+            if self.results.get(p.name) != d:
+                changed.append(d)
+            self.results[p.name] = d
+        return changed
+
+    def watch(self, report: Callable[[list[CheckDiff]], None]) -> None:
+        """Report the initial results, and then any that change, until interrupted."""
+        report(self.check_all())
+        # the selected packages' dependencies have to be watched too
+        for files in _changes(self.root, lambda: self.every_package):
+            report(self.update(files))
+
+
+def _changes(root: Path, packages: Callable[[], list[PackageDeps]]) -> Iterator[set[Path]]:
+    """
+    Yield batches of changed files.
+
+    Uses filesystem events if the optional `watchfiles` package is installed,
+    otherwise falls back to polling.
+    """
+    try:
+        # not a dependency of una, so imported dynamically
+        watchfiles: Any = importlib.import_module("watchfiles")
+    except ImportError:
+        yield from _poll_changes(root, packages)
+        return
+
+    watch_filter = watchfiles.PythonFilter(extra_extensions=(".toml", ".lock"))
+    batch: set[tuple[Any, str]]
+    for batch in watchfiles.watch(root, watch_filter=watch_filter):
+        files = {Path(p).resolve() for _, p in batch}
+        yield {f for f in files if consts.CACHE_DIR not in f.parts}
+
+
+def _poll_changes(root: Path, packages: Callable[[], list[PackageDeps]]) -> Iterator[set[Path]]:
+    """Fallback for when watchfiles isn't installed: compare stats every POLL_INTERVAL."""
+    before = _snapshot(root, packages())
+    while True:
+        time.sleep(POLL_INTERVAL)
+        after = _snapshot(root, packages())
+        changed = {f for f in before.keys() | after.keys() if before.get(f) != after.get(f)}
+        before = after
+        if changed:
+            yield changed
+
+
+def _snapshot(root: Path, packages: list[PackageDeps]) -> dict[Path, tuple[int, int]]:
+    files = [root / consts.PYPROJ_FILE, root / "uv.lock"]
+    for p in packages:
+        files.append(p.path / consts.PYPROJ_FILE)
+        files.extend(p.path.rglob("*.py"))
+    res: dict[Path, tuple[int, int]] = {}
+    for f in files:
+        try:
+            stat = f.stat()
+        except FileNotFoundError:
+            continue
+        res[f.resolve()] = (stat.st_mtime_ns, stat.st_size)
+    return res
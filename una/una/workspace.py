@@ -0,0 +1,122 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from una import package_deps, parse, timing
+from una.cache import ImportCache
+from una.types import ConfWrapper, ImportLocation, Imports
+
+
+@dataclass
+class WorkspaceGraph:
+    """
+    Everything una knows about the workspace, built once per invocation.
+
+    Member confs are globbed and loaded up front. Imports are parsed lazily,
+    at most once per package, and shared between all the package checks.
+    """
+
+    root: Path
+    ns: str
+    confs: list[ConfWrapper]
+    paths: dict[str, Path]
+    cache: ImportCache | None = None
+    jobs: int = 1
+    engine: parse.Engine = parse.Engine.AST
+    _imports: Imports = field(default_factory=dict)
+    _int_deps: Imports = field(default_factory=dict)
+
+    @classmethod
+    def build(
+        cls,
+        root: Path,
+        ns: str,
+        cache: ImportCache | None = None,
+        jobs: int = 1,
+        engine: parse.Engine = parse.Engine.AST,
+    ) -> "WorkspaceGraph":
+        confs = package_deps.get_package_confs(root)
+        paths = {c.path.name: c.path for c in confs}
+        return cls(root, ns, confs, paths, cache=cache, jobs=jobs, engine=engine)
+
+    def imports(self, name: str) -> set[str]:
+        """All imports made anywhere in the package at directory `name`."""
+        if name not in self._imports:
+            fetched = parse.fetch_all_imports(
+                {self.paths[name]}, self.cache, self.jobs, self.engine
+            )
+            self._imports[name] = fetched[name]
+        return self._imports[name]
+
+    def locations(self, name: str) -> dict[Path, list[ImportLocation]]:
+        """
+        Every import in each file of the package at directory `name`, with its position.
+
+        Not kept in memory, as it's only needed to explain a failed check,
+        and with the cache enabled the files don't have to be parsed again.
+        """
+        return parse.fetch_import_locations({self.paths[name]}, self.cache, self.jobs, self.engine)[
+            name
+        ]
+
+    def prefetch(self, names: set[str]) -> None:
+        """
+        Parse all packages reachable from `names`, one dependency level at a time.
+
+        Each level is parsed in a single batch, so the files of many packages
+        can be spread over `jobs` processes together.
+        """
+        todo = {n for n in names if n in self.paths}
+        while todo:
+            missing = {self.paths[n] for n in todo if n not in self._imports}
+            self._imports.update(
+                parse.fetch_all_imports(missing, self.cache, self.jobs, self.engine)
+            )
+            todo = {
+                d
+                for n in todo
+                for d in self.int_deps(n)
+                if d in self.paths and d not in self._int_deps
+            }
+
+    def invalidate(self, name: str) -> None:
+        """Forget the imports of the package at directory `name`, eg because its files changed."""
+        self._imports.pop(name, None)
+        self._int_deps.pop(name, None)
+
+    def int_deps(self, name: str) -> set[str]:
+        """Names of the internal packages imported by the package at directory `name`."""
+        if name not in self._int_deps:
+            only_int = _only_int_dep_imports(self.imports(name), self.ns)
+            self._int_deps[name] = _only_int_dep_name(only_int)
+        return self._int_deps[name]
+
+    @timing.timed("closure")
+    def int_dep_imports(self, names: set[str]) -> Imports:
+        """
+        Internal imports of each package reachable from `names`.
+
+        Packages that don't import anything internal are left out.
+        """
+        res: Imports = {}
+        queue = sorted(n for n in names if n in self.paths)
+        seen = set(queue)
+        while queue:
+            name = queue.pop()
+            deps = self.int_deps(name)
+            if not deps:
+                continue
+            res[name] = deps
+            for d in deps:
+                if d not in seen and d in self.paths:
+                    seen.add(d)
+                    queue.append(d)
+        return res
+
+
+def _only_int_dep_imports(imports: set[str], ns: str) -> set[str]:
+    return {i for i in imports if i.startswith(ns)}
+
+
+def _only_int_dep_name(int_dep_imports: set[str]) -> set[str]:
+    res = [i.split(".") for i in int_dep_imports]
+    return {i[1] for i in res if len(i) > 1}